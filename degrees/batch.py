@@ -0,0 +1,147 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+import degrees
+
+
+def resolve_person(value):
+    """
+    Return the person index for `value`, which is either an IMDB person
+    id or a name shared by exactly one person, or None if there is no
+    such person.
+    """
+    graph = degrees.graph
+    if value in graph.person_index:
+        return graph.person_index[value]
+    matches = graph.names.get(value.lower(), [])
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def read_pairs(f):
+    """
+    Yield (line number, source, target) for every CSV row of `f`,
+    skipping blank lines and lines starting with `#`.
+    """
+    for number, row in enumerate(csv.reader(f), 1):
+        if not row or row[0].startswith("#"):
+            continue
+        if len(row) != 2:
+            raise ValueError(f"line {number}: expected source,target")
+        yield number, row[0].strip(), row[1].strip()
+
+
+def group_by_source(pairs):
+    """
+    Group pairs by their resolved source.
+
+    Return a dictionary mapping each source person index to its list of
+    (line number, source, target, target index) entries, and the list of
+    entries whose source could not be resolved.
+    """
+    groups = dict()
+    unresolved = []
+    for number, source, target in pairs:
+        source_index = resolve_person(source)
+        entry = (number, source, target, resolve_person(target))
+        if source_index is None:
+            unresolved.append(entry)
+        else:
+            groups.setdefault(source_index, []).append(entry)
+    return groups, unresolved
+
+
+def result(number, source, target, path=None, error=None):
+    """
+    Return the JSON-serialisable result for one pair.
+    """
+    line = {"line": number, "source": source, "target": target}
+    if error is not None:
+        line["error"] = error
+    elif path is None:
+        line["degrees"] = None
+        line["path"] = None
+    else:
+        line["degrees"] = len(path)
+        line["path"] = [list(step) for step in path]
+    return line
+
+
+def answer(groups, unresolved, stats=None):
+    """
+    Yield a result for every pair, answering all pairs that share
+    a source from one BFS tree rooted at that source.
+
+    If `stats` is a dictionary, the total number of explored states is
+    kept up to date in `stats["explored"]`.
+    """
+    if stats is None:
+        stats = dict()
+    stats["explored"] = 0
+
+    for number, source, target, _ in unresolved:
+        yield result(number, source, target, error="source not found")
+
+    for source_index, entries in groups.items():
+        targets = [
+            target_index for _, _, _, target_index in entries
+            if target_index is not None
+        ]
+        tree_stats = dict()
+        parent = degrees.shortest_path_tree(source_index, targets, tree_stats)
+        stats["explored"] += tree_stats["explored"]
+
+        for number, source, target, target_index in entries:
+            if target_index is None:
+                yield result(number, source, target, error="target not found")
+            else:
+                path = degrees.path_from_tree(parent, target_index)
+                yield result(number, source, target, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries, one BFS per source. "
+        "Each input line is 'source,target', where each person is an "
+        "IMDB id or an unambiguous name. Results are written as JSON lines."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--pairs", type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin, help="file of pairs (default: stdin)"
+    )
+    parser.add_argument(
+        "--output", type=argparse.FileType("w", encoding="utf-8"),
+        default=sys.stdout, help="file for results (default: stdout)"
+    )
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        groups, unresolved = group_by_source(read_pairs(args.pairs))
+    except ValueError as error:
+        sys.exit(f"Invalid pairs: {error}")
+
+    stats = dict()
+    count = 0
+    for line in answer(groups, unresolved, stats):
+        args.output.write(json.dumps(line) + "\n")
+        count += 1
+    args.output.flush()
+
+    elapsed = time.perf_counter() - start
+    print(f"{count} pairs from {len(groups)} sources in {elapsed:.3f}s "
+          f"({count / elapsed if elapsed else 0:.1f} pairs/s, "
+          f"{stats['explored']} nodes expanded)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import degrees
+from graph import Graph
+from snapshot import load_snapshot, save_snapshot, snapshot_path
+from util import Node, QueueFrontier, StackFrontier
+
+
+def random_pairs(count, seed):
+    """
+    Draw `count` random (source, target) pairs of person ids.
+    """
+    rng = random.Random(seed)
+    person_ids = degrees.graph.person_ids
+    return [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(count)
+    ]
+
+
+def benchmark_modes(pairs, modes):
+    """
+    Run every search mode over `pairs`.
+
+    Return a dictionary mapping each mode to its total explored states,
+    wall time and list of path lengths (None when not connected).
+    """
+    results = dict()
+    for mode in modes:
+        search = degrees.SEARCH_MODES[mode]
+        explored = 0
+        lengths = []
+        start = time.perf_counter()
+        for source, target in pairs:
+            stats = dict()
+            path = search(source, target, stats)
+            explored += stats["explored"]
+            lengths.append(None if path is None else len(path))
+        results[mode] = {
+            "explored": explored,
+            "seconds": time.perf_counter() - start,
+            "lengths": lengths
+        }
+    return results
+
+
+def benchmark_frontier(frontier_class, size, probes=10000):
+    """
+    Fill a frontier of `frontier_class` with `size` nodes, then time
+    `probes` membership tests and `probes` removals.
+
+    Return the mean cost of one membership test and one removal
+    in nanoseconds.
+    """
+    frontier = frontier_class()
+    for state in range(size):
+        frontier.add(Node(state=state, parent=None, action=None))
+
+    states = range(0, size, max(1, size // probes))
+    start = time.perf_counter_ns()
+    for state in states:
+        frontier.contains_state(state)
+    contains = (time.perf_counter_ns() - start) / len(states)
+
+    probes = min(probes, size)
+    start = time.perf_counter_ns()
+    for _ in range(probes):
+        frontier.remove()
+    remove = (time.perf_counter_ns() - start) / probes
+
+    return contains, remove
+
+
+def load_dicts(directory):
+    """
+    Load the dataset into the original string-keyed dictionaries
+    of sets, for comparison against `Graph`.
+
+    Return the `people` and `movies` dictionaries.
+    """
+    people = dict()
+    movies = dict()
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["person_id"] in people and row["movie_id"] in movies:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+    return people, movies
+
+
+def measure_memory(load, *args):
+    """
+    Call `load(*args)` and return its result with the number of bytes
+    it left allocated and its peak allocation.
+    """
+    tracemalloc.start()
+    result = load(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def dict_neighbors(people, movies, person_id):
+    """
+    Return (movie_id, person_id) pairs for people who starred with
+    `person_id`, from the dictionaries returned by `load_dicts`.
+    """
+    neighbors = set()
+    for movie_id in people[person_id]["movies"]:
+        for star_id in movies[movie_id]["stars"]:
+            neighbors.add((movie_id, star_id))
+    return neighbors
+
+
+def dict_reachable(people, movies, source):
+    """
+    Count the people reachable from `source` with a BFS over
+    the dictionaries returned by `load_dicts`.
+    """
+    seen = {source}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        for _, star_id in dict_neighbors(people, movies, person_id):
+            if star_id not in seen:
+                seen.add(star_id)
+                queue.append(star_id)
+    return len(seen)
+
+
+def load_graph(directory):
+    graph = Graph()
+    graph.load(directory)
+    return graph
+
+
+def graph_reachable(graph, source):
+    """
+    Count the people reachable from `source` with a BFS over `graph`.
+    """
+    seen = bytearray(graph.num_people())
+    seen[source] = 1
+    queue = deque([source])
+    count = 1
+    while queue:
+        person = queue.popleft()
+        for _, star in graph.neighbors(person):
+            if not seen[star]:
+                seen[star] = 1
+                count += 1
+                queue.append(star)
+    return count
+
+
+def time_per_call(function, arguments):
+    """
+    Return the mean wall time in milliseconds of
+    calling `function` on each of `arguments`.
+    """
+    start = time.perf_counter()
+    for argument in arguments:
+        function(*argument)
+    return 1000 * (time.perf_counter() - start) / len(arguments)
+
+
+def search(args):
+    print("Loading data...")
+    degrees.load_data(args.directory, costars=args.costars)
+    print("Data loaded.")
+
+    if args.landmarks and not degrees.graph.has_landmarks():
+        start = time.perf_counter()
+        degrees.graph.build_landmarks(args.landmarks)
+        print(f"Chose {len(degrees.graph.landmarks)} landmarks "
+              f"in {time.perf_counter() - start:.2f}s.")
+
+    pairs = random_pairs(args.pairs, args.seed)
+    modes = list(degrees.SEARCH_MODES)
+    results = benchmark_modes(pairs, modes)
+
+    # Every mode must agree on the shortest path length
+    reference = results[modes[0]]["lengths"]
+    for mode in modes[1:]:
+        if results[mode]["lengths"] != reference:
+            sys.exit(f"Mode {mode} disagrees with {modes[0]} on path lengths.")
+
+    print(f"{len(pairs)} random pairs, "
+          f"{sum(length is not None for length in reference)} connected")
+    for mode in modes:
+        result = results[mode]
+        print(f"  {mode}: {result['explored']} nodes expanded "
+              f"({result['explored'] / len(pairs):.1f} per query), "
+              f"{result['seconds']:.3f}s "
+              f"({1000 * result['seconds'] / len(pairs):.2f} ms per query)")
+
+
+def frontier(args):
+    for frontier_class in (StackFrontier, QueueFrontier):
+        print(f"{frontier_class.__name__}")
+        for size in args.sizes:
+            contains, remove = benchmark_frontier(frontier_class, size)
+            print(f"  {size:>9} nodes: contains_state {contains:.0f} ns, "
+                  f"remove {remove:.0f} ns")
+
+
+def memory(args):
+    print("Loading dictionaries...")
+    (people, movies), dict_current, dict_peak = measure_memory(
+        load_dicts, args.directory
+    )
+    print("Loading graph...")
+    graph, graph_current, graph_peak = measure_memory(
+        load_graph, args.directory
+    )
+
+    print("Memory footprint")
+    print(f"  dictionaries: {dict_current / 2 ** 20:.1f} MiB "
+          f"(peak {dict_peak / 2 ** 20:.1f} MiB)")
+    print(f"  graph: {graph_current / 2 ** 20:.1f} MiB "
+          f"(peak {graph_peak / 2 ** 20:.1f} MiB)")
+
+    rng = random.Random(args.seed)
+    sources = [rng.randrange(graph.num_people()) for _ in range(args.queries)]
+    source_ids = [graph.person_ids[source] for source in sources]
+
+    print("Query latency")
+    print("  neighbors: dictionaries {:.4f} ms, graph {:.4f} ms".format(
+        time_per_call(
+            lambda person_id: dict_neighbors(people, movies, person_id),
+            [(person_id,) for person_id in source_ids]
+        ),
+        time_per_call(
+            lambda person: sum(1 for _ in graph.neighbors(person)),
+            [(source,) for source in sources]
+        )
+    ))
+    print("  full BFS: dictionaries {:.2f} ms, graph {:.2f} ms".format(
+        time_per_call(
+            lambda person_id: dict_reachable(people, movies, person_id),
+            [(person_id,) for person_id in source_ids[:args.traversals]]
+        ),
+        time_per_call(
+            lambda person: graph_reachable(graph, person),
+            [(source,) for source in sources[:args.traversals]]
+        )
+    ))
+
+
+def startup(args):
+    start = time.perf_counter()
+    graph = load_graph(args.directory)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    save_snapshot(graph, args.directory)
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = Graph()
+    if not load_snapshot(cached, args.directory):
+        sys.exit("Snapshot could not be loaded.")
+    load = time.perf_counter() - start
+
+    # Lookups search the mapped snapshot, so time some after the load
+    rng = random.Random(0)
+    sample = [
+        graph.person_ids[rng.randrange(graph.num_people())]
+        for _ in range(1000)
+    ] if graph.num_people() else []
+    start = time.perf_counter()
+    found = [
+        cached.names[cached.person_names[cached.person_index[person_id]].lower()]
+        for person_id in sample
+    ]
+    lookup = time.perf_counter() - start
+    for person_id, people in zip(sample, found):
+        if graph.person_index[person_id] not in people:
+            sys.exit("Snapshot lookup does not match the CSV files.")
+
+    size = os.path.getsize(snapshot_path(args.directory))
+    print(f"{graph.num_people()} people, {graph.num_movies()} movies")
+    print(f"  CSV parse: {1000 * parse:.1f} ms")
+    print(f"  snapshot save: {1000 * save:.1f} ms ({size / 2 ** 20:.1f} MiB)")
+    print(f"  snapshot load: {1000 * load:.1f} ms")
+    if sample:
+        print(f"  id and name lookup after load: "
+              f"{1e6 * lookup / len(sample):.1f} us each")
+
+
+def costars(args):
+    print("Loading data...")
+    graph = load_graph(args.directory)
+    print("Data loaded.")
+    degrees.graph = graph
+
+    pairs = random_pairs(args.pairs, args.seed)
+    modes = list(degrees.SEARCH_MODES)
+    before = benchmark_modes(pairs, modes)
+
+    start = time.perf_counter()
+    graph.build_costars()
+    build = time.perf_counter() - start
+    after = benchmark_modes(pairs, modes)
+
+    print(f"Co-star adjacency: {len(graph.costar_people)} edges "
+          f"({len(graph.person_movies)} person-movie links), "
+          f"built in {build:.2f}s")
+    for mode in modes:
+        if after[mode]["lengths"] != before[mode]["lengths"]:
+            sys.exit(f"Mode {mode} path lengths changed with co-stars.")
+        saved = (before[mode]["seconds"] - after[mode]["seconds"]) / len(pairs)
+        print(f"  {mode}: {1000 * before[mode]['seconds'] / len(pairs):.2f} ms "
+              f"-> {1000 * after[mode]['seconds'] / len(pairs):.2f} ms "
+              f"per query", end="")
+        if saved > 0:
+            print(f", build pays off after {build / saved:.0f} queries")
+        else:
+            print(", no speedup")
+
+
+def names(args):
+    print("Loading data...")
+    start = time.perf_counter()
+    degrees.load_data(args.directory, index_names=True)
+    print(f"Data loaded and names indexed in {time.perf_counter() - start:.2f}s.")
+
+    # Query with prefixes and misspellings of random names
+    rng = random.Random(args.seed)
+    graph = degrees.graph
+    queries = [
+        graph.person_names[rng.randrange(graph.num_people())]
+        for _ in range(args.queries)
+    ]
+    prefixes = [name[:max(1, len(name) // 3)] for name in queries]
+    typos = []
+    for name in queries:
+        i = rng.randrange(len(name)) if name else 0
+        typos.append(name[:i] + name[i + 1:i + 2] + name[i:i + 1] + name[i + 2:])
+
+    for mode, inputs in (
+        ("prefix", prefixes), ("fuzzy", typos), ("lookup", typos)
+    ):
+        latency = time_per_call(
+            lambda query: degrees.find_people(query, args.limit, mode),
+            [(query,) for query in inputs]
+        )
+        print(f"  {mode}: {latency:.3f} ms per query")
+
+    found = sum(
+        any(candidate["name"] == name
+            for candidate in degrees.find_people(typo, args.limit, "fuzzy"))
+        for name, typo in zip(queries, typos)
+    )
+    print(f"  fuzzy recall of misspelled names: {found}/{len(queries)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_search = commands.add_parser(
+        "search", help="compare search modes on random person pairs"
+    )
+    parser_search.add_argument("directory", nargs="?", default="large")
+    parser_search.add_argument("--pairs", type=int, default=100)
+    parser_search.add_argument("--seed", type=int, default=0)
+    parser_search.add_argument(
+        "--landmarks", type=int, default=16,
+        help="landmarks to choose for the alt mode if the snapshot has none"
+    )
+    parser_search.add_argument(
+        "--no-costars", dest="costars", action="store_false",
+        help="expand through movies even if the snapshot has co-stars"
+    )
+    parser_search.set_defaults(run=search)
+
+    parser_frontier = commands.add_parser(
+        "frontier", help="time frontier membership tests and removals"
+    )
+    parser_frontier.add_argument(
+        "--sizes", type=int, nargs="+",
+        default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 2 * 10 ** 6]
+    )
+    parser_frontier.set_defaults(run=frontier)
+
+    parser_memory = commands.add_parser(
+        "memory", help="compare dictionaries and the CSR graph"
+    )
+    parser_memory.add_argument("directory", nargs="?", default="large")
+    parser_memory.add_argument("--queries", type=int, default=1000)
+    parser_memory.add_argument("--traversals", type=int, default=5)
+    parser_memory.add_argument("--seed", type=int, default=0)
+    parser_memory.set_defaults(run=memory)
+
+    parser_startup = commands.add_parser(
+        "startup", help="compare CSV parsing with loading a snapshot"
+    )
+    parser_startup.add_argument("directory", nargs="?", default="large")
+    parser_startup.set_defaults(run=startup)
+
+    parser_costars = commands.add_parser(
+        "costars", help="compare searches with and without co-star adjacency"
+    )
+    parser_costars.add_argument("directory", nargs="?", default="large")
+    parser_costars.add_argument("--pairs", type=int, default=20)
+    parser_costars.add_argument("--seed", type=int, default=0)
+    parser_costars.set_defaults(run=costars)
+
+    parser_names = commands.add_parser(
+        "names", help="time prefix and fuzzy name lookups"
+    )
+    parser_names.add_argument("directory", nargs="?", default="large")
+    parser_names.add_argument("--queries", type=int, default=1000)
+    parser_names.add_argument("--limit", type=int, default=10)
+    parser_names.add_argument("--seed", type=int, default=0)
+    parser_names.set_defaults(run=names)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,63 @@
-import csv
+import heapq
 import sys
 
+from graph import Graph
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# People, movies and stars, interned to integer indices by load_data
+graph = Graph()
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Prefix and fuzzy index over people's names, see find_people
+name_index = None
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
 
-
-def load_data(directory):
+def load_data(directory, index_names=False, progress=None, costars=True):
     """
     Load data from CSV files into memory.
+
+    A binary snapshot of the loaded graph is kept next to the CSV files
+    and used instead of them for as long as they are unchanged.
+
+    If the CSV files are parsed, `progress` is passed on to `Graph.load`.
+
+    If `index_names` is true, also build the name index used by
+    `find_people` now rather than on its first call.
+
+    If `costars` is false, a co-star adjacency stored in the snapshot is
+    not used, and searches expand through movies instead.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global name_index
+    name_index = None
+
+    if not load_snapshot(graph, directory):
+        graph.load(directory, progress)
+        try:
+            save_snapshot(graph, directory)
+        except OSError:
+            # A read-only directory only costs us the cache
+            pass
+
+    if not costars:
+        graph.drop_costars()
+
+    if index_names:
+        name_index = NameIndex(graph)
+
+
+def report_progress(filename, stats):
+    """
+    Print how far parsing `filename` has got to standard error.
+    """
+    rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+    line = f"{filename}: {stats['rows']} rows, {rate:.0f} rows/s"
+    if stats["rejected"]:
+        reasons = ", ".join(
+            f"{count} {reason}" for reason, count in stats["rejected"].items()
+        )
+        line += f", rejected {reasons}"
+    print(line, file=sys.stderr)
 
 
 def main():
@@ -59,7 +67,7 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, progress=report_progress)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -81,25 +89,31 @@ def main():
 
         for i in range(degrees):
             print(f"{i}")
-            person1 = people[path[i][1]]["name"]
-            print(f"person 1: {people[path[i][1]]['name']}")
+            person1 = person_name(path[i][1])
+            print(f"person 1: {person1}")
 
-            person2 = people[path[i+1][1]]["name"]
-            print(f"person 2: {people[path[i+1][1]]['name']}")
+            person2 = person_name(path[i+1][1])
+            print(f"person 2: {person2}")
 
             print(f"movie: {path[i+1][0]}")
-            movie = movies[path[i+1][0]]["title"]
+            movie = movie_title(path[i+1][0])
 
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `stats` is a dictionary, the number of explored states is
+    stored in `stats["explored"]`.
     """  
     
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+
     # Keep track of number of states explored
     num_explored = 0
 
@@ -115,7 +129,9 @@ def shortest_path(source, target):
     while True:
         # If nothing left in frontier, then no path
         if frontier.empty():
-            raise Exception("no solution")
+            if stats is not None:
+                stats["explored"] = num_explored
+            return None
 
         # Choose a node from the frontier
         node = frontier.remove()
@@ -131,14 +147,14 @@ def shortest_path(source, target):
                 movies.append(node.action)
                 people.append(node.state)
                 node = node.parent
-            # print(f"{movies}")
             movies.reverse()
             people.reverse()
             # need to build a list that contains tuple of movie, people
             path = list(zip(movies,people))
-            print(f"path: {path}")
 
-            return path
+            if stats is not None:
+                stats["explored"] = num_explored
+            return path_ids(path)
 
         # Mark node as explored
         explored.add(node.state)
@@ -146,12 +162,377 @@ def shortest_path(source, target):
         # Add neighbors to frontier
         # # there's something weird here, action is a movie
         # the pattern is: person A, what movies? then find another person in that movie, then what persons in that movie
-        for action, state in neighbors_for_person(node.state):
+        for action, state in graph.neighbors(node.state):
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state=state, parent=node, action=action)
                 frontier.add(child)
 
-    raise NotImplementedError
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both ends
+    at once and meeting in the middle.
+
+    The search always expands a whole BFS layer of whichever side has
+    the smaller frontier. Once a layer reaches a person already seen
+    by the other side, the best meeting point of that layer gives a
+    shortest path, so the result has the same length as `shortest_path`.
+
+    If no possible path, returns None.
+
+    If `stats` is a dictionary, the number of explored states is
+    stored in `stats["explored"]`.
+    """
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    num_explored = 0
+
+    if source == target:
+        if stats is not None:
+            stats["explored"] = num_explored
+        return []
+
+    # Map each reached person to (previous person, movie) on its side,
+    # and to its distance from that side's root
+    forward_parent = {source: None}
+    backward_parent = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    meeting = None
+    while forward_frontier and backward_frontier:
+
+        # Expand the smaller side, it is the cheaper one to grow
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parent, depth = forward_frontier, forward_parent, forward_depth
+            other_depth = backward_depth
+        else:
+            frontier, parent, depth = backward_frontier, backward_parent, backward_depth
+            other_depth = forward_depth
+
+        next_frontier = []
+        best = None
+        for person in frontier:
+            num_explored += 1
+            for movie, neighbor in graph.neighbors(person):
+                if neighbor in depth:
+                    continue
+                parent[neighbor] = (person, movie)
+                depth[neighbor] = depth[person] + 1
+                next_frontier.append(neighbor)
+                if neighbor in other_depth:
+                    length = depth[neighbor] + other_depth[neighbor]
+                    if best is None or length < best:
+                        best = length
+                        meeting = neighbor
+
+        if best is not None:
+            break
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    if stats is not None:
+        stats["explored"] = num_explored
+    if meeting is None:
+        return None
+
+    # Walk back from the meeting point to the source...
+    path = []
+    person = meeting
+    while forward_parent[person] is not None:
+        previous, movie = forward_parent[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    # ...then forward from the meeting point to the target
+    person = meeting
+    while backward_parent[person] is not None:
+        following, movie = backward_parent[person]
+        path.append((movie, following))
+        person = following
+
+    return path_ids(path)
+
+
+def alt_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search guided by
+    landmark distances (ALT).
+
+    For any landmark L, the triangle inequality gives
+    |d(L, target) - d(L, person)| <= d(person, target), so the largest
+    such difference over all landmarks is a lower bound that never
+    overestimates, and the path found is a shortest one. A person
+    connected to a landmark the target is not connected to (or the
+    other way around) cannot reach the target and is never expanded.
+    Without landmarks, see `Graph.build_landmarks`, the bound is 0
+    and the search behaves like BFS.
+
+    If no possible path, returns None.
+
+    If `stats` is a dictionary, the number of explored states is
+    stored in `stats["explored"]`.
+    """
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    num_explored = 0
+
+    # Offsets of each landmark's row of distances, with the target's
+    # distance to that landmark
+    rows = []
+    if graph.has_landmarks():
+        n = graph.num_people()
+        distances = graph.landmark_distances
+        rows = [
+            (i * n, distances[i * n + target])
+            for i in range(len(graph.landmarks))
+        ]
+
+    def lower_bound(person):
+        """
+        Returns a lower bound on the distance from `person` to the
+        target, or None if `person` cannot reach the target.
+        """
+        bound = 0
+        for offset, to_target in rows:
+            to_person = distances[offset + person]
+            if (to_person < 0) != (to_target < 0):
+                return None
+            if abs(to_target - to_person) > bound:
+                bound = abs(to_target - to_person)
+        return bound
+
+    parent = {source: None}
+    cost = {source: 0}
+    closed = set()
+    bound = lower_bound(source)
+    heap = [] if bound is None else [(bound, 0, source)]
+
+    path = None
+    while heap:
+        # Pop the lowest estimate, preferring people farther along
+        _, negative_cost, person = heapq.heappop(heap)
+        if person in closed:
+            continue
+        num_explored += 1
+
+        if person == target:
+            path = []
+            while parent[person] is not None:
+                previous, movie = parent[person]
+                path.append((movie, person))
+                person = previous
+            path.reverse()
+            break
+
+        closed.add(person)
+        next_cost = 1 - negative_cost
+        for movie, neighbor in graph.neighbors(person):
+            if neighbor in closed or next_cost >= cost.get(neighbor, next_cost + 1):
+                continue
+            bound = lower_bound(neighbor)
+            if bound is None:
+                continue
+            cost[neighbor] = next_cost
+            parent[neighbor] = (person, movie)
+            heapq.heappush(heap, (next_cost + bound, -next_cost, neighbor))
+
+    if stats is not None:
+        stats["explored"] = num_explored
+    return None if path is None else path_ids(path)
+
+
+def path_ids(path):
+    """
+    Convert a path of (movie, person) indices into
+    (movie_id, person_id) IMDB id pairs.
+    """
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+def shortest_path_tree(source, targets, stats=None):
+    """
+    Run one BFS from person index `source` until every person index in
+    `targets` has been reached, or the component is exhausted.
+
+    Returns a dictionary mapping each reached person index to its
+    (parent person, movie) pair, or None for the source.
+
+    If `stats` is a dictionary, the number of explored states is
+    stored in `stats["explored"]`.
+    """
+    num_explored = 0
+    parent = {source: None}
+    remaining = set(targets) - {source}
+    frontier = [source]
+
+    while frontier and remaining:
+        next_frontier = []
+        for person in frontier:
+            num_explored += 1
+            for movie, neighbor in graph.neighbors(person):
+                if neighbor not in parent:
+                    parent[neighbor] = (person, movie)
+                    remaining.discard(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+
+    if stats is not None:
+        stats["explored"] = num_explored
+    return parent
+
+
+def distances_from(source):
+    """
+    Returns an array holding the degrees of separation between person
+    index `source` and every person index, or -1 for people who are
+    not connected to `source`.
+    """
+    return graph.distances(source)
+
+
+def path_from_tree(parent, target):
+    """
+    Returns the list of (movie_id, person_id) pairs leading to person
+    index `target` in a tree from `shortest_path_tree`, or None if the
+    tree does not reach `target`.
+    """
+    if target not in parent:
+        return None
+    path = []
+    person = target
+    while parent[person] is not None:
+        previous, movie = parent[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+    return path_ids(path)
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns the layered DAG of every shortest path from person index
+    `source` to person index `target`, or None if they are not
+    connected.
+
+    The DAG is a dictionary mapping every person on some shortest path,
+    other than the source, to the list of (previous person, movie) pairs
+    that reach them on a shortest path, with one pair per shared movie.
+    People appear in order of their distance from the source.
+    """
+    if source == target:
+        return {}
+
+    depth = {source: 0}
+    predecessors = dict()
+    frontier = [source]
+    while frontier and target not in depth:
+        next_frontier = []
+        for person in frontier:
+            next_depth = depth[person] + 1
+            for movie in graph.movies_for(person):
+                for star in graph.stars_for(movie):
+                    if star not in depth:
+                        depth[star] = next_depth
+                        predecessors[star] = [(person, movie)]
+                        next_frontier.append(star)
+                    elif depth[star] == next_depth:
+                        predecessors[star].append((person, movie))
+        frontier = next_frontier
+
+    if target not in depth:
+        return None
+
+    # Keep only the people the target can be reached from
+    keep = {target}
+    stack = [target]
+    while stack:
+        for previous, _ in predecessors[stack.pop()]:
+            if previous != source and previous not in keep:
+                keep.add(previous)
+                stack.append(previous)
+    return {
+        person: pairs
+        for person, pairs in predecessors.items() if person in keep
+    }
+
+
+def count_dag_paths(dag, source, target):
+    """
+    Returns the number of paths from `source` to `target` in `dag`,
+    without enumerating them.
+    """
+    counts = {source: 1}
+    for person, pairs in dag.items():
+        counts[person] = sum(counts[previous] for previous, _ in pairs)
+    return counts[target]
+
+
+def dag_paths(dag, source, target):
+    """
+    Yields every path from `source` to `target` in `dag` as a list of
+    (movie, person) index pairs, one at a time.
+    """
+    stack = [(target, ())]
+    while stack:
+        person, suffix = stack.pop()
+        if person == source:
+            yield list(suffix)
+            continue
+        for previous, movie in reversed(dag[person]):
+            stack.append((previous, ((movie, person),) + suffix))
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, stopping after `limit` paths
+    if `limit` is given. Two paths differ if they go through different
+    people or different movies.
+
+    Yields nothing if there is no possible path.
+    """
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return
+    for count, path in enumerate(dag_paths(dag, source, target)):
+        if limit is not None and count >= limit:
+            return
+        yield path_ids(path)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns the number of shortest paths that connect the source to the
+    target, or 0 if there is no possible path.
+    """
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return 0
+    return count_dag_paths(dag, source, target)
+
+
+# Search functions that can answer a (source, target) query
+SEARCH_MODES = {
+    "bfs": shortest_path,
+    "bidirectional": bidirectional_shortest_path,
+    "alt": alt_shortest_path,
+}
 
 
 def person_id_for_name(name):
@@ -159,15 +540,18 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = [
+        graph.person_ids[person]
+        for person in graph.names.get(name.lower(), [])
+    ]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = graph.person_index[person_id]
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -180,6 +564,41 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(query, limit=10, mode="lookup"):
+    """
+    Returns up to `limit` ranked candidates for `query`, each a
+    dictionary of person_id, name, birth and a score between 0 and 1,
+    without prompting.
+
+    `mode` is "prefix" for autocomplete, "fuzzy" for typo-tolerant
+    matching, or "lookup" for exact, then prefix, then fuzzy matches.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(graph)
+    if mode == "prefix":
+        return name_index.prefix(query, limit)
+    elif mode == "fuzzy":
+        return name_index.fuzzy(query, limit)
+    elif mode == "lookup":
+        return name_index.lookup(query, limit)
+    raise ValueError(f"unknown mode: {mode}")
+
+
+def person_name(person_id):
+    """
+    Returns the name of the person with IMDB id `person_id`.
+    """
+    return graph.person_names[graph.person_index[person_id]]
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of the movie with IMDB id `movie_id`.
+    """
+    return graph.movie_titles[graph.movie_index[movie_id]]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -187,11 +606,9 @@ def neighbors_for_person(person_id):
     
     This returns all 
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.neighbors(graph.person_index[person_id]):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
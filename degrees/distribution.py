@@ -0,0 +1,144 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import degrees
+
+
+def init_worker(directory, costars=True):
+    """
+    Make the graph available in a worker process.
+
+    Forked workers inherit the parent's graph copy-on-write, so there is
+    nothing to do. Spawned workers load it from the snapshot, whose
+    arrays are memory-mapped and so shared through the page cache.
+    """
+    if degrees.graph.num_people() == 0:
+        degrees.load_data(directory, costars=costars)
+
+
+def histogram_for(roots):
+    """
+    Return a Counter of degrees of separation from every person index in
+    `roots` to everyone else, with key None for people not connected.
+    """
+    histogram = Counter()
+    for root in roots:
+        counts = Counter(degrees.distances_from(root))
+        histogram[None] += counts.pop(-1, 0)
+        # Leave out each root's distance to themself
+        counts[0] -= 1
+        histogram.update(counts)
+    del histogram[0]
+    return histogram
+
+
+def chunks(roots, size):
+    for i in range(0, len(roots), size):
+        yield roots[i:i + size]
+
+
+def distribution(directory, roots, processes, chunk_size, costars=True):
+    """
+    Compute the histogram of degrees of separation from `roots`, sharding
+    the roots across a pool of `processes` workers.
+    """
+    if processes == 1:
+        return histogram_for(roots)
+
+    histogram = Counter()
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(directory, costars)
+    ) as pool:
+        for partial in pool.imap_unordered(
+            histogram_for, chunks(roots, chunk_size)
+        ):
+            histogram.update(partial)
+    return histogram
+
+
+def print_histogram(histogram):
+    connected = sum(
+        count for distance, count in histogram.items() if distance is not None
+    )
+    total = sum(
+        distance * count
+        for distance, count in histogram.items() if distance is not None
+    )
+    print("Degrees of separation")
+    for distance in sorted(d for d in histogram if d is not None):
+        count = histogram[distance]
+        print(f"  {distance}: {count} ({100 * count / connected:.2f}%)")
+    print(f"  not connected: {histogram[None]}")
+    if connected:
+        print(f"Mean degrees of separation: {total / connected:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Histogram of degrees of separation from a sample of "
+        "people to everyone else, computed across a process pool."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--sample", type=int, default=1000,
+                        help="number of BFS roots to sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=8,
+                        help="roots handed to a worker at a time")
+    parser.add_argument("--scaling", action="store_true",
+                        help="also time 1, 2, 4, ... processes")
+    parser.add_argument("--no-costars", dest="costars", action="store_false",
+                        help="expand through movies even if the snapshot "
+                        "has a co-star adjacency")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, costars=args.costars)
+    print("Data loaded.")
+
+    num_people = degrees.graph.num_people()
+    if num_people == 0:
+        sys.exit("No people in dataset.")
+    rng = random.Random(args.seed)
+    roots = rng.sample(range(num_people), min(args.sample, num_people))
+
+    if args.scaling:
+        counts = []
+        processes = 1
+        while processes < args.processes:
+            counts.append(processes)
+            processes *= 2
+        counts.append(args.processes)
+    else:
+        counts = [args.processes]
+
+    histogram = None
+    baseline = None
+    for processes in counts:
+        start = time.perf_counter()
+        result = distribution(
+            args.directory, roots, processes, args.chunk_size, args.costars
+        )
+        elapsed = time.perf_counter() - start
+        if histogram is not None and result != histogram:
+            sys.exit(f"Histogram with {processes} processes does not match.")
+        histogram = result
+        if baseline is None:
+            baseline = elapsed
+        report = f"{processes} processes: {elapsed:.2f}s " \
+                 f"({len(roots) / elapsed:.1f} roots/s"
+        if args.scaling:
+            report += f", speedup over 1 process {baseline / elapsed:.2f}x"
+        print(report + ")")
+
+    print_histogram(histogram)
+
+
+if __name__ == "__main__":
+    main()
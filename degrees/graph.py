@@ -0,0 +1,361 @@
+import csv
+import time
+from array import array
+from collections import Counter
+from itertools import islice
+
+# Rows parsed at a time while streaming the CSV files
+CHUNK_ROWS = 100000
+
+
+class Graph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    IMDB ids are interned to dense integer indices: person `p` is
+    `person_ids[p]` and movie `m` is `movie_ids[m]`. Both directions of
+    the star relation are stored in compressed sparse row (CSR) form:
+    the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self):
+        # Per-person columns, indexed by person index
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+
+        # Per-movie columns, indexed by movie index
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Maps IMDB ids to indices, replaced by binary searching lookups
+        # when loaded from a snapshot
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Maps lowercase names to a list of person indices, likewise
+        self.names = {}
+
+        # CSR arrays for person -> movies and movie -> stars
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Optional CSR person -> co-stars adjacency, with one movie
+        # witnessing each edge, filled in by build_costars
+        self.costar_offsets = None
+        self.costar_people = None
+        self.costar_movies = None
+
+        # Optional landmark people and their distances to everyone, with
+        # landmark i's distance to person p at
+        # landmark_distances[i * num_people() + p], filled in by
+        # build_landmarks
+        self.landmarks = None
+        self.landmark_distances = None
+
+        # Rows read and rejected per CSV file, filled in by load
+        self.load_stats = dict()
+
+    def load(self, directory, progress=None):
+        """
+        Stream people, movies and stars from the CSV files in `directory`.
+
+        Files are parsed with a plain CSV reader, CHUNK_ROWS rows at a
+        time, into the final columns and arrays without building
+        per-row dictionaries. Rows that cannot be used are counted by
+        reason in `load_stats`, which maps each file name to its number
+        of rows, rejected rows and seconds spent.
+
+        If `progress` is given, it is called after every chunk with the
+        file name and that file's `load_stats` entry so far.
+        """
+        self.__init__()
+
+        # Load people, keeping the first row for each id
+        for chunk in self.read_chunks(
+            directory, "people.csv", ("id", "name", "birth"), progress
+        ):
+            rejected = self.load_stats["people.csv"]["rejected"]
+            for person_id, name, birth in chunk:
+                if person_id in self.person_index:
+                    rejected["duplicate id"] += 1
+                else:
+                    self.add_person(person_id, name, birth)
+
+        # Load movies, keeping the first row for each id
+        for chunk in self.read_chunks(
+            directory, "movies.csv", ("id", "title", "year"), progress
+        ):
+            rejected = self.load_stats["movies.csv"]["rejected"]
+            for movie_id, title, year in chunk:
+                if movie_id in self.movie_index:
+                    rejected["duplicate id"] += 1
+                else:
+                    self.add_movie(movie_id, title, year)
+
+        # Load stars as parallel arrays of (person, movie) indices
+        person_index = self.person_index
+        movie_index = self.movie_index
+        star_people = array("i")
+        star_movies = array("i")
+        for chunk in self.read_chunks(
+            directory, "stars.csv", ("person_id", "movie_id"), progress
+        ):
+            rejected = self.load_stats["stars.csv"]["rejected"]
+            for person_id, movie_id in chunk:
+                person = person_index.get(person_id)
+                movie = movie_index.get(movie_id)
+                if person is None:
+                    rejected["unknown person_id"] += 1
+                elif movie is None:
+                    rejected["unknown movie_id"] += 1
+                else:
+                    star_people.append(person)
+                    star_movies.append(movie)
+
+        self.person_offsets, self.person_movies = build_csr(
+            len(self.person_ids), star_people, star_movies
+        )
+        self.movie_offsets, self.movie_stars = build_csr(
+            len(self.movie_ids), star_movies, star_people
+        )
+
+    def read_chunks(self, directory, filename, columns, progress=None):
+        """
+        Yield lists of tuples holding `columns` of the rows of `filename`
+        in `directory`, CHUNK_ROWS rows at a time, and keep its
+        `load_stats` entry up to date. Rows too short to hold every
+        column are rejected as malformed.
+        """
+        stats = self.load_stats[filename] = {
+            "rows": 0,
+            "rejected": Counter(),
+            "seconds": 0.0
+        }
+        start = time.perf_counter()
+        with open(f"{directory}/{filename}", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            try:
+                indices = [header.index(column) for column in columns]
+            except ValueError:
+                raise ValueError(
+                    f"{filename} must have columns {', '.join(columns)}"
+                )
+            width = max(indices) + 1
+
+            while True:
+                rows = list(islice(reader, CHUNK_ROWS))
+                if not rows:
+                    break
+                chunk = [
+                    tuple(row[i] for i in indices)
+                    for row in rows if len(row) >= width
+                ]
+                stats["rows"] += len(rows)
+                if len(chunk) < len(rows):
+                    stats["rejected"]["malformed row"] += len(rows) - len(chunk)
+                del rows
+                yield chunk
+
+                stats["seconds"] = time.perf_counter() - start
+                if progress is not None:
+                    progress(filename, stats)
+
+    def add_person(self, person_id, name, birth):
+        """
+        Intern a person and return their index.
+        """
+        person = len(self.person_ids)
+        self.person_index[person_id] = person
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.names.setdefault(name.lower(), []).append(person)
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Intern a movie and return its index.
+        """
+        movie = len(self.movie_ids)
+        self.movie_index[movie_id] = movie
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return movie
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_for(self, person):
+        """
+        Return the indices of the movies person `person` starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for(self, movie):
+        """
+        Return the indices of the people who starred in movie `movie`.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def build_costars(self):
+        """
+        Precompute the deduplicated person -> co-star adjacency, keeping
+        the first shared movie of each pair as the edge's witness.
+        """
+        offsets = array("i", [0])
+        costars = array("i")
+        witnesses = array("i")
+        for person in range(self.num_people()):
+            witness = dict()
+            for movie in self.movies_for(person):
+                for star in self.stars_for(movie):
+                    if star != person and star not in witness:
+                        witness[star] = movie
+            for star in sorted(witness):
+                costars.append(star)
+                witnesses.append(witness[star])
+            offsets.append(len(costars))
+        self.costar_offsets = offsets
+        self.costar_people = costars
+        self.costar_movies = witnesses
+
+    def has_costars(self):
+        return self.costar_offsets is not None
+
+    def drop_costars(self):
+        """
+        Forget the co-star adjacency, so neighbors expands through movies.
+        """
+        self.costar_offsets = None
+        self.costar_people = None
+        self.costar_movies = None
+
+    def distances(self, source):
+        """
+        Return an array holding the number of edges between person
+        `source` and every person, or -1 for people not connected
+        to `source`.
+        """
+        distance = array("i", [-1]) * self.num_people()
+        distance[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for person in frontier:
+                for _, neighbor in self.neighbors(person):
+                    if distance[neighbor] < 0:
+                        distance[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distance
+
+    def build_landmarks(self, count):
+        """
+        Choose up to `count` landmark people and store their distances
+        to everyone.
+
+        Landmarks are picked greedily to be far apart: the first is the
+        person farthest from the person with the most movies, and each
+        next one is the person whose distance to the nearest landmark
+        chosen so far is largest.
+        """
+        self.landmarks = array("i")
+        self.landmark_distances = array("h")
+        if self.num_people() == 0:
+            return
+
+        start = max(
+            range(self.num_people()),
+            key=lambda person: (
+                self.person_offsets[person + 1] - self.person_offsets[person]
+            )
+        )
+        nearest = self.distances(start)
+        while len(self.landmarks) < count:
+            landmark = max(range(self.num_people()), key=nearest.__getitem__)
+            if landmark in self.landmarks or nearest[landmark] < 0:
+                break
+            distance = self.distances(landmark)
+            self.landmarks.append(landmark)
+            self.landmark_distances.extend(array("h", distance))
+            if len(self.landmarks) == 1:
+                nearest = distance
+            else:
+                nearest = array("i", map(min, nearest, distance))
+
+    def has_landmarks(self):
+        return self.landmarks is not None
+
+    def neighbors(self, person):
+        """
+        Yield (movie, person) index pairs for people who starred
+        with `person`.
+
+        With the co-star adjacency built, each co-star is yielded once.
+        Otherwise co-stars are yielded once per shared movie, and
+        `person` themself is included.
+        """
+        if self.costar_offsets is not None:
+            costar_people = self.costar_people
+            costar_movies = self.costar_movies
+            for i in range(
+                self.costar_offsets[person], self.costar_offsets[person + 1]
+            ):
+                yield costar_movies[i], costar_people[i]
+            return
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+
+def build_csr(num_rows, rows, columns):
+    """
+    Build CSR offsets and indices from parallel arrays of `rows` and
+    `columns`. Each row's indices are sorted and deduplicated.
+    """
+    # Count entries per row, then turn counts into start offsets
+    counts = array("i", bytes(4 * (num_rows + 1)))
+    for row in rows:
+        counts[row + 1] += 1
+    for row in range(num_rows):
+        counts[row + 1] += counts[row]
+
+    # Scatter columns into their row's slot
+    indices = array("i", bytes(4 * len(columns)))
+    cursor = counts[:-1]
+    for row, column in zip(rows, columns):
+        indices[cursor[row]] = column
+        cursor[row] += 1
+
+    # Sort and deduplicate each row, compacting as we go
+    offsets = array("i", [0])
+    compact = array("i")
+    for row in range(num_rows):
+        compact.extend(sorted(set(indices[counts[row]:counts[row + 1]])))
+        offsets.append(len(compact))
+
+    return offsets, compact
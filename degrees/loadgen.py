@@ -0,0 +1,113 @@
+import argparse
+import csv
+import json
+import random
+import sys
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def read_person_ids(directory):
+    """
+    Return the list of person ids in `directory`'s people.csv.
+    """
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        return [row[0] for row in list(csv.reader(f))[1:] if row]
+
+
+def percentile(values, fraction):
+    """
+    Return the value at `fraction` of the way through sorted `values`.
+    """
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+def run(url, pairs, concurrency, requests):
+    """
+    Send `requests` path queries for `pairs`, round-robin, from
+    `concurrency` threads.
+
+    Return the list of latencies in seconds, the number of failed
+    requests and the wall time.
+    """
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            source, target = pairs[i % len(pairs)]
+            query = urlencode({"source": source, "target": target})
+            start = time.perf_counter()
+            try:
+                with urlopen(f"{url}/path?{query}") as response:
+                    json.load(response)
+                ok = True
+            except (HTTPError, URLError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    failures[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate load against server.py and report latency."
+    )
+    parser.add_argument("directory", nargs="?", default="large",
+                        help="dataset the server was started with")
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distinct-pairs", type=int, default=200,
+                        help="number of distinct pairs to cycle through; "
+                        "fewer pairs means more cache hits")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    person_ids = read_person_ids(args.directory)
+    if not person_ids:
+        sys.exit("No people in dataset.")
+    pairs = [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(args.distinct_pairs)
+    ]
+
+    latencies, failures, elapsed = run(
+        args.url, pairs, args.concurrency, args.requests
+    )
+    if not latencies:
+        sys.exit(f"All {failures} requests failed.")
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f}s "
+          f"from {args.concurrency} threads, {failures} failed")
+    print(f"  QPS: {len(latencies) / elapsed:.1f}")
+    print(f"  p50: {1000 * percentile(latencies, 0.50):.2f} ms")
+    print(f"  p99: {1000 * percentile(latencies, 0.99):.2f} ms")
+    print(f"  max: {1000 * latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant lookup over the names of a `Graph`.
+
+    Distinct lowercase names are kept in a sorted list, so all names
+    with a given prefix form one contiguous run found by binary search.
+
+    For fuzzy lookup names are split into words. Each word maps to the
+    array of names containing it, and every variant of a word with one
+    character deleted maps back to the word. Two words at most one edit
+    apart always share a variant, so the words close to a misspelled
+    query word are found with a handful of dictionary lookups.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+        # Sorted distinct lowercase names
+        self.keys = sorted(graph.names)
+
+        # Word -> array of key positions, and deletion variant -> words
+        postings = defaultdict(lambda: array("i"))
+        for position, key in enumerate(self.keys):
+            for word in set(key.split()):
+                postings[word].append(position)
+        self.postings = dict(postings)
+
+        # The same positions, shortest name first, so the best matches of
+        # a single word are found without scanning all of them
+        self.by_length = {
+            word: array("i", sorted(
+                positions, key=lambda position: (len(self.keys[position]), position)
+            ))
+            for word, positions in self.postings.items()
+        }
+
+        self.variants = defaultdict(list)
+        for word in self.postings:
+            for variant in deletions(word):
+                self.variants[variant].append(word)
+        self.variants = dict(self.variants)
+
+    def candidates(self, key, score):
+        """
+        Return a candidate dictionary for every person named `key`.
+        """
+        graph = self.graph
+        return [
+            {
+                "person_id": graph.person_ids[person],
+                "name": graph.person_names[person],
+                "birth": graph.person_births[person],
+                "score": score
+            }
+            for person in graph.names[key]
+        ]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Return up to `limit` candidates whose name starts with `prefix`,
+        in alphabetical order of name.
+        """
+        prefix = prefix.lower()
+        results = []
+        position = bisect_left(self.keys, prefix)
+        while (len(results) < limit
+               and position < len(self.keys)
+               and self.keys[position].startswith(prefix)):
+            results.extend(self.candidates(self.keys[position], 1.0))
+            position += 1
+        return results[:limit]
+
+    def similar_words(self, word):
+        """
+        Return a dictionary mapping every indexed word at most one edit
+        away from `word` to its edit distance.
+        """
+        similar = dict()
+        for variant in deletions(word):
+            for candidate in self.variants.get(variant, ()):
+                if candidate not in similar:
+                    distance = edit_distance(word, candidate)
+                    if distance <= 1:
+                        similar[candidate] = distance
+        return similar
+
+    def fuzzy(self, query, limit=10):
+        """
+        Return up to `limit` candidates whose name matches `query` word
+        for word with at most one typo per word, best first. A typo is a
+        missing, extra, wrong or swapped character. Names with more
+        words than the query also match, so surnames alone work too.
+        """
+        words = query.lower().split()
+        if not words:
+            return []
+
+        # Start from the query word whose similar words have the fewest
+        # names, and check the other words only for the names matching it
+        similar = [self.similar_words(word) for word in words]
+        similar.sort(key=lambda close: sum(
+            len(self.postings[word]) for word in close
+        ))
+        if len(similar) == 1:
+            return self.best_matches(similar[0], len(words[0]), limit)
+        total = dict()
+        for word, distance in similar[0].items():
+            for position in self.postings[word]:
+                if distance < total.get(position, 2):
+                    total[position] = distance
+
+        for others in similar[1:]:
+            # A name is in a word's postings exactly when the word is one
+            # of its own, so look its words up instead of the postings
+            matched = dict()
+            for position, cost in total.items():
+                distance = min(
+                    (others[word] for word in self.keys[position].split()
+                     if word in others),
+                    default=None
+                )
+                if distance is not None:
+                    matched[position] = cost + distance
+            total = matched
+            if not total:
+                return []
+
+        # Rank by typos, then by how much of the name the query covers
+        ranked = heapq.nsmallest(
+            limit, total.items(),
+            key=lambda item: (item[1], len(self.keys[item[0]]), item[0])
+        )
+        return self.scored(ranked, len(" ".join(words)), limit)
+
+    def best_matches(self, similar, length, limit):
+        """
+        Return up to `limit` candidates for a one-word query of `length`
+        characters, given the dictionary of its similar words, ranked as
+        `fuzzy` ranks them.
+
+        Each similar word's names are merged shortest first, fewest typos
+        first, so only as many names are visited as are returned.
+        """
+        def stream(word, distance):
+            for position in self.by_length[word]:
+                yield distance, len(self.keys[position]), position
+
+        streams = [
+            stream(word, distance) for word, distance in similar.items()
+        ]
+        ranked = []
+        seen = set()
+        for cost, _, position in heapq.merge(*streams):
+            if position not in seen:
+                seen.add(position)
+                ranked.append((position, cost))
+                if len(ranked) == limit:
+                    break
+        return self.scored(ranked, length, limit)
+
+    def scored(self, ranked, length, limit):
+        """
+        Return up to `limit` candidates for the `(position, typos)` pairs
+        of `ranked`, scored for a query of `length` characters.
+        """
+        results = []
+        for position, cost in ranked:
+            score = (1 - cost / length) * length / max(length, len(self.keys[position]))
+            results.extend(self.candidates(self.keys[position], score))
+        return results[:limit]
+
+    def lookup(self, query, limit=10):
+        """
+        Return up to `limit` ranked candidates for `query`: exact name
+        matches first, then other names starting with `query`, then
+        names similar to `query`.
+        """
+        candidates = self.prefix(query, limit)
+        if len(candidates) < limit:
+            candidates += self.fuzzy(query, limit)
+        results = []
+        seen = set()
+        for candidate in candidates:
+            if candidate["person_id"] in seen:
+                continue
+            seen.add(candidate["person_id"])
+            if candidate["name"].lower() != query.lower():
+                if candidate["score"] == 1.0:
+                    # Rank proper prefix matches below exact matches
+                    candidate["score"] = 0.99
+            results.append(candidate)
+        results.sort(key=lambda candidate: -candidate["score"])
+        return results[:limit]
+
+
+def deletions(word):
+    """
+    Return `word` and every string made by deleting one character of it.
+    """
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a, b):
+    """
+    Return the optimal string alignment distance between `a` and `b`:
+    the fewest insertions, deletions, substitutions and swaps of
+    adjacent characters that turn `a` into `b`.
+    """
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost
+            )
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
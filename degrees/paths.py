@@ -0,0 +1,54 @@
+import argparse
+import sys
+
+import degrees
+from batch import resolve_person
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count and list every shortest connection between "
+        "two people, given as IMDB ids or unambiguous names."
+    )
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--limit", type=int, default=10,
+                        help="most paths to print (default: 10)")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    source = resolve_person(args.source)
+    if source is None:
+        sys.exit("Source not found.")
+    target = resolve_person(args.target)
+    if target is None:
+        sys.exit("Target not found.")
+
+    dag = degrees.shortest_path_dag(source, target)
+    if dag is None:
+        sys.exit("Not connected.")
+
+    count = degrees.count_dag_paths(dag, source, target)
+    source_id = degrees.graph.person_ids[source]
+    paths = degrees.dag_paths(dag, source, target)
+    for number in range(min(count, args.limit)):
+        path = degrees.path_ids(next(paths))
+        if number == 0:
+            print(f"{count} shortest paths of {len(path)} degrees of separation.")
+        print(f"Path {number + 1}:")
+        person1 = degrees.person_name(source_id)
+        for movie_id, person_id in path:
+            person2 = degrees.person_name(person_id)
+            movie = degrees.movie_title(movie_id)
+            print(f"  {person1} and {person2} starred in {movie}")
+            person1 = person2
+    if count > args.limit:
+        print(f"... and {count - args.limit} more.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+import degrees
+from snapshot import save_snapshot
+
+
+def costars(args):
+    start = time.perf_counter()
+    degrees.graph.build_costars()
+    elapsed = time.perf_counter() - start
+    save_snapshot(degrees.graph, args.directory)
+    print(f"Built {len(degrees.graph.costar_people)} co-star edges "
+          f"in {elapsed:.2f}s and saved them to the snapshot.")
+
+
+def landmarks(args):
+    start = time.perf_counter()
+    degrees.graph.build_landmarks(args.count)
+    elapsed = time.perf_counter() - start
+    save_snapshot(degrees.graph, args.directory)
+    print(f"Chose {len(degrees.graph.landmarks)} landmarks "
+          f"in {elapsed:.2f}s and saved their distances to the snapshot.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline precomputation steps for degrees, stored in "
+        "the snapshot next to the CSV files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_costars = commands.add_parser(
+        "costars", help="build the deduplicated co-star adjacency"
+    )
+    parser_costars.add_argument("directory", nargs="?", default="large")
+    parser_costars.set_defaults(run=costars)
+
+    parser_landmarks = commands.add_parser(
+        "landmarks", help="choose landmarks and store distances from them"
+    )
+    parser_landmarks.add_argument("directory", nargs="?", default="large")
+    parser_landmarks.add_argument("--count", type=int, default=16)
+    parser_landmarks.set_defaults(run=landmarks)
+
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
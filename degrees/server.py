@@ -0,0 +1,210 @@
+import argparse
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from batch import resolve_person
+from distribution import init_worker
+
+# Search mode used to answer queries, set by main
+mode = "bidirectional"
+
+# Pool answering queries in other processes, or None to answer them
+# in the request's own thread, and its number of processes
+executor = None
+processes = 0
+
+# Number of queries answered, by whether they came from the cache
+counters = {"queries": 0, "misses": 0}
+counters_lock = threading.Lock()
+
+
+def search(mode, source, target):
+    """
+    Returns the path between IMDB ids `source` and `target`
+    using search mode `mode`.
+    """
+    return degrees.SEARCH_MODES[mode](source, target)
+
+
+def find_path(source, target):
+    """
+    Returns the path between IMDB ids `source` and `target`, answered
+    by the worker pool if there is one.
+    """
+    with counters_lock:
+        counters["misses"] += 1
+    if executor is None:
+        return search(mode, source, target)
+    return executor.submit(search, mode, source, target).result()
+
+
+# find_path with recent results cached, resized by main
+cached_path = lru_cache(maxsize=10000)(find_path)
+
+
+def describe_path(source, target, path):
+    """
+    Return the JSON-serialisable answer for a path between
+    IMDB ids `source` and `target`.
+    """
+    answer = {
+        "source": {"person_id": source, "name": degrees.person_name(source)},
+        "target": {"person_id": target, "name": degrees.person_name(target)},
+        "degrees": None if path is None else len(path),
+        "path": None
+    }
+    if path is not None:
+        answer["path"] = [
+            {
+                "movie_id": movie_id,
+                "title": degrees.movie_title(movie_id),
+                "person_id": person_id,
+                "name": degrees.person_name(person_id)
+            }
+            for movie_id, person_id in path
+        ]
+    return answer
+
+
+class Server(ThreadingHTTPServer):
+    # Queue bursts of connections instead of refusing them
+    request_queue_size = 128
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers GET requests:
+
+    /path?source=...&target=...   shortest path between two people,
+                                  given as IMDB ids or unambiguous names
+    /people?q=...&mode=...&limit= ranked candidates for a name
+    /stats                        query and cache counters
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {
+            key: values[0] for key, values in parse_qs(url.query).items()
+        }
+        try:
+            if url.path == "/path":
+                self.reply(200, self.path_query(params))
+            elif url.path == "/people":
+                self.reply(200, self.people_query(params))
+            elif url.path == "/stats":
+                self.reply(200, self.stats())
+            else:
+                self.reply(404, {"error": "not found"})
+        except LookupError as error:
+            self.reply(404, {"error": str(error.args[0])})
+        except ValueError as error:
+            self.reply(400, {"error": str(error)})
+
+    def path_query(self, params):
+        people = []
+        for field in ("source", "target"):
+            if field not in params:
+                raise ValueError(f"missing {field}")
+            person = resolve_person(params[field])
+            if person is None:
+                raise LookupError(f"{field} not found")
+            people.append(degrees.graph.person_ids[person])
+        source, target = people
+
+        with counters_lock:
+            counters["queries"] += 1
+        return describe_path(source, target, cached_path(source, target))
+
+    def people_query(self, params):
+        if "q" not in params:
+            raise ValueError("missing q")
+        limit = int(params.get("limit", 10))
+        return degrees.find_people(
+            params["q"], limit, params.get("mode", "lookup")
+        )
+
+    def stats(self):
+        cache = cached_path.cache_info()
+        with counters_lock:
+            return {
+                "queries": counters["queries"],
+                "cache_hits": counters["queries"] - counters["misses"],
+                "cache_size": cache.currsize,
+                "cache_capacity": cache.maxsize,
+                "mode": mode,
+                "processes": processes
+            }
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet under load
+        pass
+
+
+def main():
+    global mode, executor, processes, cached_path
+
+    parser = argparse.ArgumentParser(
+        description="Serve degrees queries over HTTP from a graph that is "
+        "loaded once and kept in memory."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--mode", choices=list(degrees.SEARCH_MODES),
+                        default="bidirectional")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="answer queries in a pool of this many "
+                        "processes (default: in the request threads)")
+    parser.add_argument("--cache-size", type=int, default=10000,
+                        help="number of recent results to keep")
+    parser.add_argument("--no-costars", dest="costars", action="store_false",
+                        help="expand through movies even if the snapshot "
+                        "has a co-star adjacency")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(
+        args.directory, index_names=True, costars=args.costars
+    )
+    print("Data loaded.")
+
+    mode = args.mode
+    cached_path = lru_cache(maxsize=args.cache_size)(find_path)
+    processes = args.processes
+    if processes:
+        executor = ProcessPoolExecutor(
+            processes, initializer=init_worker,
+            initargs=(args.directory, args.costars)
+        )
+        # Start the workers with one no-op task each while this is the
+        # only thread, rather than forking from a request thread later
+        for future in [executor.submit(int) for _ in range(processes)]:
+            future.result()
+
+    server = Server((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# Files a snapshot is built from, and the name of the snapshot itself
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+SNAPSHOT = "graph.snapshot"
+
+MAGIC = b"DEGSNAP1"
+VERSION = 2
+
+# Graph attributes stored in a snapshot, by kind
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+COSTAR_ARRAYS = ("costar_offsets", "costar_people", "costar_movies")
+LANDMARK_ARRAYS = ("landmarks", "landmark_distances")
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+
+# Indices sorted by id and by lowercase name, which the id and name
+# lookups binary search instead of being rebuilt on every load
+ORDERS = ("person_id_order", "movie_id_order", "name_order")
+
+
+def source_key(directory):
+    """
+    Return a key identifying the current CSV files in `directory`
+    by their size and modification time.
+    """
+    key = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.append([filename, stat.st_size, stat.st_mtime_ns])
+    return key
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT)
+
+
+def save_snapshot(graph, directory):
+    """
+    Write `graph` to the snapshot file of `directory`, including its
+    co-star adjacency and landmark distances if they have been built.
+
+    The file is an 8-byte magic number, the length of a JSON header as
+    8 bytes, the header itself padded to 8 bytes, then every section,
+    each padded to 8 bytes. The header records the source key and, for
+    each section, its kind, number of entries, length in bytes and
+    offset from the end of the header.
+
+    A string column is stored as the offsets of its entries, as 64-bit
+    integers, followed by the entries encoded as UTF-8. The person and
+    movie indices sorted by id, and the person indices sorted by
+    lowercase name, are stored as arrays too.
+    """
+    arrays = ARRAYS
+    if graph.has_costars():
+        arrays += COSTAR_ARRAYS
+    if graph.has_landmarks():
+        arrays += LANDMARK_ARRAYS
+    sections = []
+    for name in arrays:
+        data = memoryview(getattr(graph, name))
+        sections.append((name, "array", data.format, len(data), bytes(data)))
+    for name in STRINGS:
+        encoded = [value.encode("utf-8") for value in getattr(graph, name)]
+        offsets = array("q", [0])
+        offsets.extend(accumulate(map(len, encoded)))
+        data = bytes(offsets) + b"".join(encoded)
+        sections.append((name, "strings", None, len(encoded), data))
+    people = range(graph.num_people())
+    orders = {
+        "person_id_order": sorted(people, key=graph.person_ids.__getitem__),
+        "movie_id_order": sorted(
+            range(graph.num_movies()), key=graph.movie_ids.__getitem__
+        ),
+        # Stable, so people with the same name stay in index order
+        "name_order": sorted(
+            people, key=lambda person: graph.person_names[person].lower()
+        )
+    }
+    for name in ORDERS:
+        data = memoryview(array("i", orders[name]))
+        sections.append((name, "array", data.format, len(data), bytes(data)))
+
+    # Section offsets are relative to the end of the header
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "key": source_key(directory),
+        "sections": dict()
+    }
+    offset = 0
+    for name, kind, typecode, count, data in sections:
+        header["sections"][name] = {
+            "kind": kind,
+            "typecode": typecode,
+            "count": count,
+            "offset": offset,
+            "size": len(data)
+        }
+        offset = align(offset + len(data))
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (align(len(header_bytes)) - len(header_bytes))
+
+    # Write to a temporary file first so readers never see a partial file
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, kind, typecode, count, data in sections:
+            f.write(data)
+            f.write(b"\0" * (align(len(data)) - len(data)))
+    os.replace(temporary, path)
+
+
+def load_snapshot(graph, directory):
+    """
+    Fill `graph` from the snapshot file of `directory`.
+
+    Integer arrays and string columns are memory-mapped rather than
+    copied, and the id and name lookups search the sorted orders stored
+    in the snapshot, so nothing is decoded or rebuilt until it is used.
+    Return True on success, or False if there is no snapshot or it is
+    out of date with the CSV files, in which case `graph` is left
+    untouched.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            contents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+
+    header = read_header(contents)
+    try:
+        key = source_key(directory)
+    except OSError:
+        key = None
+    if (header is None
+            or header["version"] != VERSION
+            or header["byteorder"] != sys.byteorder
+            or header["key"] != key):
+        contents.close()
+        return False
+
+    view = memoryview(contents)[header_start(contents):]
+    graph.__init__()
+    orders = dict()
+    for name, section in header["sections"].items():
+        data = view[section["offset"]:section["offset"] + section["size"]]
+        if section["kind"] == "array":
+            data = data.cast(section["typecode"])
+            if name in ORDERS:
+                orders[name] = data
+            else:
+                setattr(graph, name, data)
+        else:
+            size = 8 * (section["count"] + 1)
+            setattr(graph, name, StringColumn(
+                data[:size].cast("q"), data[size:]
+            ))
+    graph.person_index = IdLookup(graph.person_ids, orders["person_id_order"])
+    graph.movie_index = IdLookup(graph.movie_ids, orders["movie_id_order"])
+    graph.names = NameLookup(graph.person_names, orders["name_order"])
+    return True
+
+
+class StringColumn():
+    """
+    Read-only sequence of the strings of a snapshot column, decoded from
+    the mapped file as they are accessed.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("column index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class IdLookup():
+    """
+    Read-only mapping from the ids of a snapshot column to their indices,
+    found by binary search over the indices sorted by id.
+    """
+
+    def __init__(self, ids, order):
+        self.ids = ids
+        self.order = order
+
+    def get(self, value, default=None):
+        position = bisect_left(self.order, value, key=self.ids.__getitem__)
+        if position < len(self.order):
+            index = self.order[position]
+            if self.ids[index] == value:
+                return index
+        return default
+
+    def __getitem__(self, value):
+        index = self.get(value)
+        if index is None:
+            raise KeyError(value)
+        return index
+
+    def __contains__(self, value):
+        return self.get(value) is not None
+
+    def __len__(self):
+        return len(self.order)
+
+
+class NameLookup():
+    """
+    Read-only mapping from lowercase names to the list of indices of the
+    people with that name, found by binary search over the people sorted
+    by lowercase name.
+    """
+
+    def __init__(self, names, order):
+        self.names = names
+        self.order = order
+
+    def key(self, person):
+        return self.names[person].lower()
+
+    def get(self, name, default=None):
+        low = bisect_left(self.order, name, key=self.key)
+        high = bisect_right(self.order, name, lo=low, key=self.key)
+        if low == high:
+            return default
+        return self.order[low:high].tolist()
+
+    def __getitem__(self, name):
+        people = self.get(name)
+        if people is None:
+            raise KeyError(name)
+        return people
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        # Distinct names, in sorted order
+        previous = None
+        for person in self.order:
+            name = self.key(person)
+            if name != previous:
+                yield name
+                previous = name
+
+
+def read_header(contents):
+    """
+    Return the JSON header of a snapshot, or None if `contents`
+    is not a snapshot.
+    """
+    if contents[:len(MAGIC)] != MAGIC:
+        return None
+    start = len(MAGIC) + 8
+    length = int.from_bytes(contents[len(MAGIC):start], "little")
+    try:
+        return json.loads(contents[start:start + length])
+    except ValueError:
+        return None
+
+
+def header_start(contents):
+    """
+    Return the offset of the first section in snapshot `contents`.
+    """
+    start = len(MAGIC) + 8
+    return start + int.from_bytes(contents[len(MAGIC):start], "little")
+
+
+def align(offset):
+    return (offset + 7) // 8 * 8
@@ -0,0 +1,133 @@
+import numpy as np
+
+from factors import GENES, child_table
+
+# Gene counts of this many people vary within a block of assignments,
+# giving blocks of 3 ** 10 = 59049 assignments
+BLOCK_PEOPLE = 10
+
+
+def log_tables(probs):
+    """
+    Return log tables of the gene prior, of P(child's genes | mother's
+    genes, father's genes) and of P(trait | genes), indexed by gene
+    counts and, for traits, by 0 for False and 1 for True.
+    """
+    prior = np.log([probs["gene"][genes] for genes in GENES])
+    children = np.log(child_table(probs))
+    traits = np.log([
+        [probs["trait"][genes][False], probs["trait"][genes][True]]
+        for genes in GENES
+    ])
+    return prior, children, traits
+
+
+def batched_probabilities(people, probs, block_people=BLOCK_PEOPLE):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by exact enumeration, like `heredity.enumerate_probabilities`, but
+    evaluating a whole block of assignments at a time with NumPy.
+
+    Each assignment is encoded as an integer array of gene counts plus a
+    0/1 array of traits, with people of known traits fixed to them, so no
+    assignment fails the evidence. A block holds every combination of
+    gene counts of the first `block_people` people, for fixed gene counts
+    of the rest and fixed traits. Log joint probabilities are computed by
+    indexing the log tables with whole columns of gene counts, and gene
+    totals are accumulated with `np.add.at`. Traits are constant within
+    a block, so trait totals take one addition per block.
+    """
+    names = list(people)
+    n = len(names)
+    index = {person: i for i, person in enumerate(names)}
+    prior, children, traits = log_tables(probs)
+
+    # A blank parent reads gene count 0 from an extra column, the way
+    # inherit treats a parent in neither gene set
+    blank = n
+    founders = np.array([
+        i for i, person in enumerate(names)
+        if people[person]["mother"] is None
+        and people[person]["father"] is None
+    ], dtype=np.int64)
+    with_parents = np.array([
+        i for i, person in enumerate(names)
+        if people[person]["mother"] is not None
+        or people[person]["father"] is not None
+    ], dtype=np.int64)
+    mothers = np.array([
+        index.get(people[names[i]]["mother"], blank) for i in with_parents
+    ], dtype=np.int64)
+    fathers = np.array([
+        index.get(people[names[i]]["father"], blank) for i in with_parents
+    ], dtype=np.int64)
+
+    unknown = np.array([
+        i for i, person in enumerate(names)
+        if people[person]["trait"] is None
+    ], dtype=np.int64)
+    known = np.array([
+        i for i, person in enumerate(names)
+        if people[person]["trait"] is not None
+    ], dtype=np.int64)
+    known_traits = np.array([
+        1 if people[person]["trait"] else 0 for person in names
+    ], dtype=np.int64)[known]
+
+    # Every combination of gene counts of the people varying in a block
+    low = min(n, block_people)
+    low_genes = np.indices((len(GENES),) * low).reshape(low, -1).T
+    size = len(low_genes)
+    genes = np.zeros((size, n + 1), dtype=np.int64)
+    genes[:, :low] = low_genes
+
+    # Flat index of (person, gene count) for np.add.at
+    cells = genes[:, :n] + len(GENES) * np.arange(n)
+    gene_totals = np.zeros(n * len(GENES))
+    trait_totals = np.zeros((n, 2))
+    rows = np.arange(n)
+
+    for high in range(len(GENES) ** (n - low)):
+        genes[:, low:n] = high // len(GENES) ** np.arange(n - low) % 3
+        cells[:, low:] = genes[:, low:n] + len(GENES) * rows[low:]
+
+        # Terms that do not depend on unknown traits
+        log_genes = (
+            prior[genes[:, founders]].sum(axis=1)
+            + children[
+                genes[:, mothers], genes[:, fathers], genes[:, with_parents]
+            ].sum(axis=1)
+            + traits[genes[:, known], known_traits].sum(axis=1)
+        )
+        unknown_genes = genes[:, unknown]
+
+        block_total = np.zeros(size)
+        trait = np.zeros(n, dtype=np.int64)
+        trait[known] = known_traits
+        for combination in range(2 ** len(unknown)):
+            trait[unknown] = combination // 2 ** np.arange(len(unknown)) % 2
+            p = np.exp(
+                log_genes
+                + traits[unknown_genes, trait[unknown]].sum(axis=1)
+            )
+            block_total += p
+            trait_totals[rows, trait] += p.sum()
+
+        np.add.at(
+            gene_totals, cells.ravel(),
+            np.broadcast_to(block_total[:, None], cells.shape).ravel()
+        )
+
+    gene_totals = gene_totals.reshape(n, len(GENES))
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+    return {
+        person: {
+            "gene": {g: float(gene_totals[i, g]) for g in (2, 1, 0)},
+            "trait": {
+                True: float(trait_totals[i, 1]),
+                False: float(trait_totals[i, 0])
+            }
+        }
+        for i, person in enumerate(names)
+    }
@@ -0,0 +1,341 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from heredity import (
+    PROBS, enumerate_probabilities, junction_probabilities, load_data
+)
+from batched import batched_probabilities
+from elimination import variable_elimination
+from junction import JunctionTree
+from pruned import pruned_probabilities
+from sampling import gibbs_probabilities, weighting_probabilities
+
+
+def random_pedigree(num_people, seed, known=0.5, loops=0.0):
+    """
+    Return a random pedigree of `num_people` people in the format of
+    `heredity.load_data`.
+
+    Each new person is either a founder marrying into the family or a
+    child of an existing couple, so the pedigree is a tree of families.
+    A fraction `loops` of couples are two existing family members instead,
+    which closes loops. A fraction `known` of people have a known trait.
+    """
+    rng = random.Random(seed)
+    people = dict()
+    couples = []
+    singles = []
+
+    def add_person(mother=None, father=None):
+        name = f"P{len(people)}"
+        trait = None
+        if rng.random() < known:
+            trait = rng.random() < 0.1
+        people[name] = {
+            "name": name, "mother": mother, "father": father, "trait": trait
+        }
+        singles.append(name)
+        return name
+
+    add_person()
+    while len(people) < num_people:
+        if not couples or (rng.random() < 0.3 and len(people) + 2 <= num_people):
+            # Marry someone single, to a founder or to another member
+            partner = singles.pop(rng.randrange(len(singles)))
+            if rng.random() < loops and singles:
+                spouse = singles.pop(rng.randrange(len(singles)))
+            else:
+                spouse = add_person()
+                singles.remove(spouse)
+            couples.append((partner, spouse))
+        else:
+            mother, father = rng.choice(couples)
+            add_person(mother, father)
+        if not singles:
+            add_person()
+    return people
+
+
+def difference(expected, actual):
+    """
+    Return the largest difference between two results in the format
+    `heredity.main` prints.
+    """
+    return max(
+        abs(expected[person][field][value] - actual[person][field][value])
+        for person in expected
+        for field in expected[person]
+        for value in expected[person][field]
+    )
+
+
+def reference(args):
+    for filename in args.files:
+        people = load_data(filename)
+        expected = enumerate_probabilities(people)
+        for name, actual in (
+            ("Variable elimination", variable_elimination(people, PROBS)),
+            ("Junction tree", junction_probabilities(people)),
+            ("Batched enumeration", batched_probabilities(people, PROBS)),
+            ("Pruned enumeration", pruned_probabilities(people, PROBS))
+        ):
+            largest = difference(expected, actual)
+            print(f"{filename}: {len(people)} people, {name.lower()} "
+                  f"largest difference {largest:.2e}")
+            if largest > 1e-12:
+                sys.exit(f"{name} does not match enumeration on {filename}.")
+
+
+def enumeration(args):
+    cases = [(filename, load_data(filename)) for filename in args.files]
+    cases += [
+        (f"random, {num_people} people",
+         random_pedigree(num_people, args.seed))
+        for num_people in args.sizes
+    ]
+    for name, people in cases:
+        if len(people) <= args.enumerate_limit:
+            start = time.perf_counter()
+            expected = enumerate_probabilities(people)
+            reference_time = time.perf_counter() - start
+        else:
+            expected = None
+
+        start = time.perf_counter()
+        actual = batched_probabilities(people, PROBS)
+        elapsed = time.perf_counter() - start
+
+        line = f"{name}: batched {elapsed:.4f}s"
+        if expected is not None:
+            line += (f", enumerate_probabilities {reference_time:.4f}s "
+                     f"({reference_time / elapsed:.0f}x), largest "
+                     f"difference {difference(expected, actual):.2e}")
+        print(line)
+
+
+def traced(function, *args):
+    """
+    Return the result of calling `function` with `args`, the time it
+    took and its peak traced allocation in bytes. Tracing slows the call
+    down, so time it in a separate untraced run.
+    """
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def pruned(args):
+    cases = [(filename, load_data(filename)) for filename in args.files]
+    cases += [
+        (f"random, {num_people} people",
+         random_pedigree(num_people, args.seed))
+        for num_people in args.sizes
+    ]
+    for name, people in cases:
+        print(f"{name}:")
+        expected = None
+        if len(people) <= args.enumerate_limit:
+            stats = dict()
+            expected, elapsed, peak = traced(
+                enumerate_probabilities, people, stats
+            )
+            print(f"  enumerate_probabilities: {stats['assignments']} "
+                  f"assignments in {elapsed:.4f}s, peak {peak / 1024:.0f} KiB")
+
+        stats = dict()
+        actual, elapsed, peak = traced(
+            pruned_probabilities, people, PROBS, stats
+        )
+        line = (f"  pruned:                  {stats['assignments']} "
+                f"assignments ({stats['pruned']} skipped) in "
+                f"{elapsed:.4f}s, peak {peak / 1024:.0f} KiB")
+        if expected is not None:
+            line += f", largest difference {difference(expected, actual):.2e}"
+        print(line)
+
+
+def sampling(args):
+    for num_people in args.sizes:
+        people = random_pedigree(num_people, args.seed, loops=args.loops)
+        print(f"{num_people} people:")
+        start = time.perf_counter()
+        expected = variable_elimination(people, PROBS)
+        elapsed = time.perf_counter() - start
+        print(f"  variable elimination: {elapsed:.3f}s")
+
+        for name, sampler in (
+            ("likelihood weighting", weighting_probabilities),
+            ("Gibbs sampling", gibbs_probabilities)
+        ):
+            stats = dict()
+            actual = sampler(
+                people, PROBS, args.samples, args.seconds, args.chains,
+                args.processes, args.seed, stats=stats
+            )
+            r_hat = "" if stats["r_hat"] is None \
+                else f", R-hat {stats['r_hat']:.3f}"
+            print(f"  {name}: {stats['samples']} samples in "
+                  f"{stats['seconds']:.3f}s, effective "
+                  f"{stats['effective_samples']:.0f}{r_hat}, standard error "
+                  f"{stats['standard_error']:.4f}, largest difference "
+                  f"{difference(expected, actual):.4f}")
+
+
+def scale(args):
+    for num_people in args.sizes:
+        people = random_pedigree(num_people, args.seed, loops=args.loops)
+        start = time.perf_counter()
+        variable_elimination(people, PROBS)
+        elapsed = time.perf_counter() - start
+        print(f"{num_people} people: variable elimination in {elapsed:.2f}s")
+
+
+def compare(args):
+    for num_people in args.sizes:
+        people = random_pedigree(num_people, args.seed, loops=args.loops)
+        print(f"{num_people} people:")
+
+        if num_people <= args.enumerate_limit:
+            start = time.perf_counter()
+            enumerate_probabilities(people)
+            elapsed = time.perf_counter() - start
+            print(f"  enumeration:          {elapsed:.3f}s")
+
+        if num_people <= args.elimination_limit:
+            start = time.perf_counter()
+            expected = variable_elimination(people, PROBS)
+            elapsed = time.perf_counter() - start
+            print(f"  variable elimination: {elapsed:.3f}s")
+        else:
+            expected = None
+
+        start = time.perf_counter()
+        tree = JunctionTree(people, PROBS)
+        compiled = time.perf_counter() - start
+        start = time.perf_counter()
+        tree.calibrate()
+        actual = tree.probabilities()
+        elapsed = time.perf_counter() - start
+        width = max(len(clique) for clique in tree.cliques)
+        print(f"  junction tree:        compiled in {compiled:.3f}s, "
+              f"largest clique {width}, calibrated and queried "
+              f"in {elapsed:.3f}s ({tree.computed} messages)")
+        if expected is not None:
+            print(f"  largest difference from variable elimination "
+                  f"{difference(expected, actual):.2e}")
+
+        # Change one trait, then query one person and then everyone
+        rng = random.Random(args.seed)
+        for _ in range(args.requeries):
+            person, query = rng.sample(list(people), 2)
+            tree.set_trait(person, rng.choice([True, False, None]))
+            before = tree.computed
+            start = time.perf_counter()
+            tree.gene_marginal(query)
+            single = time.perf_counter() - start
+            single_messages = tree.computed - before
+            start = time.perf_counter()
+            tree.probabilities()
+            elapsed = time.perf_counter() - start
+            print(f"  new trait for {person}: one marginal in "
+                  f"{single * 1000:.1f}ms ({single_messages} messages), "
+                  f"all in {elapsed:.3f}s "
+                  f"({tree.computed - before} messages)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for heredity.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_reference = commands.add_parser(
+        "reference", help="check the exact engines against enumeration"
+    )
+    parser_reference.add_argument(
+        "files", nargs="*",
+        default=["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+    )
+    parser_reference.set_defaults(run=reference)
+
+    parser_enumeration = commands.add_parser(
+        "enumeration", help="time batched against plain enumeration"
+    )
+    parser_enumeration.add_argument(
+        "files", nargs="*",
+        default=["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+    )
+    parser_enumeration.add_argument(
+        "--sizes", type=int, nargs="+", default=[7, 8, 10]
+    )
+    parser_enumeration.add_argument("--enumerate-limit", type=int, default=7)
+    parser_enumeration.add_argument("--seed", type=int, default=0)
+    parser_enumeration.set_defaults(run=enumeration)
+
+    parser_pruned = commands.add_parser(
+        "pruned", help="count the assignments that pruned and plain "
+        "enumeration evaluate, with time and peak memory"
+    )
+    parser_pruned.add_argument(
+        "files", nargs="*",
+        default=["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+    )
+    parser_pruned.add_argument(
+        "--sizes", type=int, nargs="+", default=[7, 8, 10, 12]
+    )
+    parser_pruned.add_argument("--enumerate-limit", type=int, default=7)
+    parser_pruned.add_argument("--seed", type=int, default=0)
+    parser_pruned.set_defaults(run=pruned)
+
+    parser_sampling = commands.add_parser(
+        "sampling", help="compare likelihood weighting and Gibbs sampling "
+        "with variable elimination"
+    )
+    parser_sampling.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 300]
+    )
+    parser_sampling.add_argument("--loops", type=float, default=0.1)
+    parser_sampling.add_argument("--samples", type=int, default=20000)
+    parser_sampling.add_argument("--seconds", type=float)
+    parser_sampling.add_argument("--chains", type=int, default=4)
+    parser_sampling.add_argument("--processes", type=int)
+    parser_sampling.add_argument("--seed", type=int, default=0)
+    parser_sampling.set_defaults(run=sampling)
+
+    parser_scale = commands.add_parser(
+        "scale", help="time variable elimination on random pedigrees"
+    )
+    parser_scale.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 300, 1000]
+    )
+    parser_scale.add_argument("--loops", type=float, default=0.1,
+                              help="fraction of couples within the family")
+    parser_scale.add_argument("--seed", type=int, default=0)
+    parser_scale.set_defaults(run=scale)
+
+    parser_compare = commands.add_parser(
+        "compare", help="compare enumeration, variable elimination and "
+        "the junction tree, including re-queries after new evidence"
+    )
+    parser_compare.add_argument(
+        "--sizes", type=int, nargs="+", default=[6, 100, 300, 1000]
+    )
+    parser_compare.add_argument("--loops", type=float, default=0.1)
+    parser_compare.add_argument("--enumerate-limit", type=int, default=6)
+    parser_compare.add_argument("--elimination-limit", type=int, default=300)
+    parser_compare.add_argument("--requeries", type=int, default=3)
+    parser_compare.add_argument("--seed", type=int, default=0)
+    parser_compare.set_defaults(run=compare)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from factors import combine, person_factors, rescale, to_probabilities
+
+
+def interaction_graph(factors):
+    """
+    Return a dictionary mapping each variable to the set of variables it
+    shares a factor with.
+    """
+    neighbors = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbors:
+        neighbors[variable].discard(variable)
+    return neighbors
+
+
+def fill_in(neighbors, variable):
+    """
+    Return how many edges eliminating `variable` would add between its
+    neighbors.
+    """
+    around = list(neighbors[variable])
+    return sum(
+        1
+        for i, first in enumerate(around)
+        for second in around[i + 1:]
+        if second not in neighbors[first]
+    )
+
+
+def elimination_order(factors):
+    """
+    Return an order in which to eliminate every variable of `factors`,
+    chosen greedily by fewest fill-in edges, then fewest neighbors.
+
+    Eliminating a variable only changes the fill-in of its neighbors and
+    of theirs, so only those scores are recomputed.
+    """
+    neighbors = interaction_graph(factors)
+    scores = {
+        variable: (fill_in(neighbors, variable), len(neighbors[variable]))
+        for variable in neighbors
+    }
+    order = []
+    while scores:
+        variable = min(scores, key=scores.get)
+        order.append(variable)
+        del scores[variable]
+
+        around = neighbors.pop(variable)
+        for neighbor in around:
+            neighbors[neighbor].discard(variable)
+            neighbors[neighbor].update(around - {neighbor})
+        affected = set(around)
+        for neighbor in around:
+            affected.update(neighbors[neighbor])
+        for other in affected:
+            scores[other] = (
+                fill_in(neighbors, other), len(neighbors[other])
+            )
+    return order
+
+
+def eliminate(factors, order):
+    """
+    Sum every variable of `order` out of `factors` in turn, and return
+    the factors left over.
+    """
+    # Factors by id, and the ids of the factors mentioning each variable
+    pool = dict(enumerate(factors))
+    buckets = dict()
+    for i, factor in pool.items():
+        for variable in factor.variables:
+            buckets.setdefault(variable, set()).add(i)
+
+    next_id = len(pool)
+    for variable in order:
+        ids = buckets.pop(variable, set())
+        if not ids:
+            continue
+        involved = [pool.pop(i) for i in ids]
+        keep = []
+        for factor in involved:
+            for other in factor.variables:
+                if other != variable and other not in keep:
+                    keep.append(other)
+                    buckets[other] -= ids
+        factor = rescale(combine(involved, tuple(keep)))
+        pool[next_id] = factor
+        for other in keep:
+            buckets[other].add(next_id)
+        next_id += 1
+    return list(pool.values())
+
+
+def marginal(factors, order, variable):
+    """
+    Return the unnormalised marginal of `variable`, eliminating every
+    other variable in `order`.
+    """
+    left = eliminate(factors, [other for other in order if other != variable])
+    return combine(left, (variable,)).table
+
+
+def variable_elimination(people, probs):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    in the format `heredity.main` prints, by variable elimination over
+    the gene counts.
+
+    Traits only depend on their own person's genes, so known traits are
+    folded into that person's factor as likelihoods, and unknown ones are
+    computed from the gene marginal afterwards.
+    """
+    factors = person_factors(people, probs)
+    order = elimination_order(factors)
+    marginals = {
+        person: marginal(factors, order, person) for person in people
+    }
+    return to_probabilities(people, probs, marginals)
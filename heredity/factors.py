@@ -0,0 +1,142 @@
+import string
+
+import numpy as np
+
+# Gene counts a person can have, in the order of every table axis
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Non-negative table over the gene counts of some people: `table` has
+    one axis of length 3 per person in `variables`, indexed by gene count.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = np.asarray(table, dtype=float)
+
+
+def passing_probabilities(probs):
+    """
+    Return the probability that a parent with 0, 1 or 2 copies of the
+    gene passes one on, as `heredity.inherit` computes it.
+    """
+    mutation = probs["mutation"]
+    return np.array([
+        mutation,
+        0.5 * (1 - mutation) + 0.5 * mutation,
+        1 - mutation
+    ])
+
+
+def child_table(probs):
+    """
+    Return the table of P(child's genes | mother's genes, father's
+    genes), with axes (mother, father, child).
+    """
+    passes = passing_probabilities(probs)
+    mother = passes[:, None]
+    father = passes[None, :]
+    return np.stack([
+        (1 - mother) * (1 - father),
+        mother * (1 - father) + father * (1 - mother),
+        mother * father
+    ], axis=-1)
+
+
+def trait_likelihood(probs, trait):
+    """
+    Return P(trait | genes) for each gene count, or ones if `trait` is
+    unknown, since an unobserved trait sums out to one.
+    """
+    if trait is None:
+        return np.ones(len(GENES))
+    return np.array([probs["trait"][genes][trait] for genes in GENES])
+
+
+def person_factors(people, probs, evidence=True):
+    """
+    Return one factor per person of `people`, as returned by
+    `heredity.load_data`: the person's gene distribution given their
+    parents, or the unconditional one for people without parents, times
+    the likelihood of their known trait unless `evidence` is false.
+
+    A parent left blank is treated as passing the gene on only by
+    mutation, as in `heredity.joint_probability`.
+    """
+    prior = np.array([probs["gene"][genes] for genes in GENES])
+    children = child_table(probs)
+    factors = []
+    for person, data in people.items():
+        likelihood = trait_likelihood(
+            probs, data["trait"] if evidence else None
+        )
+        mother, father = data["mother"], data["father"]
+        if mother is None and father is None:
+            factors.append(Factor((person,), prior * likelihood))
+        elif mother is None or father is None:
+            # Condition the child table on a blank parent with no gene
+            parent = mother if father is None else father
+            factors.append(Factor(
+                (parent, person), children[:, 0, :] * likelihood
+            ))
+        else:
+            factors.append(Factor(
+                (mother, father, person), children * likelihood
+            ))
+    return factors
+
+
+def combine(factors, keep):
+    """
+    Return the product of `factors`, summed over every variable not in
+    `keep`, as a factor over `keep` in that order.
+    """
+    letters = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            if variable not in letters:
+                letters[variable] = string.ascii_letters[len(letters)]
+    inputs = ",".join(
+        "".join(letters[variable] for variable in factor.variables)
+        for factor in factors
+    )
+    output = "".join(letters[variable] for variable in keep)
+    return Factor(keep, np.einsum(
+        f"{inputs}->{output}", *(factor.table for factor in factors)
+    ))
+
+
+def rescale(factor):
+    """
+    Divide `factor` by its largest entry, so that long products of small
+    probabilities do not underflow. Marginals are normalised at the end,
+    so constant factors do not change them.
+    """
+    largest = factor.table.max()
+    if largest > 0:
+        factor.table /= largest
+    return factor
+
+
+def to_probabilities(people, probs, marginals):
+    """
+    Return the dictionary that `heredity.main` prints, from `marginals`
+    mapping each person to an unnormalised array over gene counts.
+    """
+    probabilities = dict()
+    for person, marginal in marginals.items():
+        genes = marginal / marginal.sum()
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(
+                genes[g] * probs["trait"][g][True] for g in GENES
+            )
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": {g: float(genes[g]) for g in (2, 1, 0)},
+            "trait": {True: float(has_trait), False: float(1 - has_trait)}
+        }
+    return probabilities
@@ -1,7 +1,15 @@
+import argparse
 import csv
 import itertools
 import sys
 
+from batched import batched_probabilities
+from elimination import variable_elimination
+from junction import JunctionTree
+from pruned import pruned_probabilities
+from sampling import gibbs_probabilities as gibbs_sampling
+from sampling import weighting_probabilities as likelihood_weighting
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -37,12 +45,70 @@ PROBS = {
 }
 
 
+# Default budget of the sampling methods
+SAMPLES = 10000
+CHAINS = 4
+
+
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        usage="python heredity.py data.csv "
+              f"[{'|'.join(list(METHODS) + list(SAMPLERS))}] "
+              "[--samples N] [--seconds T] [--chains C] [--processes P] "
+              "[--seed S]"
+    )
+    parser.add_argument("data")
+    parser.add_argument("method", nargs="?", default="enumerate",
+                        choices=list(METHODS) + list(SAMPLERS),
+                        help="inference method, the original exact "
+                        "enumeration by default")
+    parser.add_argument("--samples", type=int,
+                        help="sample budget of the sampling methods, "
+                        f"{SAMPLES} unless only --seconds is given")
+    parser.add_argument("--seconds", type=float,
+                        help="time budget of the sampling methods")
+    parser.add_argument("--chains", type=int, default=CHAINS)
+    parser.add_argument("--processes", type=int,
+                        help="worker processes, one per CPU by default")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.chains < 1:
+        parser.error("--chains must be at least 1")
+    if args.processes is not None and args.processes < 1:
+        parser.error("--processes must be at least 1")
+    if args.samples is not None and args.samples < 1:
+        parser.error("--samples must be at least 1")
+    people = load_data(args.data)
+
+    if args.method in SAMPLERS:
+        samples = args.samples
+        if samples is None:
+            samples = SAMPLES if args.seconds is None else sys.maxsize
+        stats = dict()
+        probabilities = SAMPLERS[args.method](
+            people, samples, args.seconds, args.chains,
+            args.processes, args.seed, stats
+        )
+        print_probabilities(people, probabilities)
+        print_diagnostics(stats)
+        return
+
+    probabilities = METHODS[args.method](people)
+
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+def enumerate_probabilities(people, stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by summing the joint probability of every assignment of genes and
+    traits that is consistent with the known traits.
+
+    If `stats` is given, it records how many assignments were evaluated.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -59,19 +125,15 @@ def main():
         }
         for person in people
     }
+    evaluated = 0
 
-    # Loop over all sets of people who might have the trait
+    # Loop over the sets of people who might have the trait, keeping
+    # known traits fixed rather than generating sets that violate them
     names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+    known = {person for person in names if people[person]["trait"]}
+    unknown = {person for person in names if people[person]["trait"] is None}
+    for extra in powerset(unknown):
+        have_trait = known | extra
 
         # Loop over all sets of people who might have the gene
         for one_gene in powerset(names):
@@ -80,11 +142,79 @@ def main():
                 # Update probabilities with new joint probability
                 p = joint_probability(people, one_gene, two_genes, have_trait)
                 update(probabilities, one_gene, two_genes, have_trait, p)
+                evaluated += 1
+
+    if stats is not None:
+        stats["assignments"] = evaluated
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
+
+def prune_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by streaming the gene assignments consistent with the known traits.
+    """
+    return pruned_probabilities(people, PROBS)
+
+
+def batch_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by exact enumeration over blocks of assignments at once.
+    """
+    return batched_probabilities(people, PROBS)
+
+
+def eliminate_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by variable elimination.
+    """
+    return variable_elimination(people, PROBS)
+
+
+def junction_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`
+    from a calibrated junction tree.
+    """
+    tree = JunctionTree(people, PROBS)
+    tree.calibrate()
+    return tree.probabilities()
+
+
+def weighting_probabilities(people, samples=SAMPLES, seconds=None,
+                            chains=CHAINS, processes=None, seed=None,
+                            stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`
+    estimated by likelihood weighting, within a budget of `samples`
+    samples or `seconds`, whichever runs out first.
+    """
+    return likelihood_weighting(
+        people, PROBS, samples, seconds, chains, processes, seed,
+        stats=stats
+    )
+
+
+def gibbs_probabilities(people, samples=SAMPLES, seconds=None,
+                        chains=CHAINS, processes=None, seed=None,
+                        stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`
+    estimated by Gibbs sampling over gene counts, within a budget of
+    `samples` sweeps or `seconds`, whichever runs out first.
+    """
+    return gibbs_sampling(
+        people, PROBS, samples, seconds, chains, processes, seed,
+        stats=stats
+    )
+
+
+def print_probabilities(people, probabilities):
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -94,6 +224,15 @@ def main():
                 print(f"    {value}: {p:.4f}")
 
 
+def print_diagnostics(stats):
+    print(f"{stats['method'].capitalize()}: {stats['samples']} samples "
+          f"from {stats['chains']} chains in {stats['seconds']:.2f}s")
+    print(f"  Effective samples: {stats['effective_samples']:.0f}")
+    if stats["r_hat"] is not None:
+        print(f"  Largest R-hat: {stats['r_hat']:.4f}")
+    print(f"  Largest standard error: {stats['standard_error']:.4f}")
+
+
 def load_data(filename):
     """
     Load gene and trait data from a file into a dictionary.
@@ -118,14 +257,13 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Generate all possible subsets of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -139,12 +277,6 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    print(f"PEOPLE: {people}")
-    print(f"ONE GENE: {one_gene}")
-    print(f"TWO GENES: {two_genes}")
-    print(f"HAVE TRAIT: {have_trait}")
-
-
     # initialize
     dist_probability = dict()
     gene = dict()
@@ -169,11 +301,9 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     # calculate probability for each person
     for person in people:
         # if person doesn't have parents
-        print(f"    PERSON: {person}: {people[person]}")
         if people[person]['mother'] == None and people[person]['father'] == None:
             # prob person has gene * prob person has trait
             dist_probability[person] = PROBS["gene"][gene[person]]*PROBS["trait"][gene[person]][trait[person]]
-            print(f"        NO PARENTS DIST_PROB: {dist_probability[person]} ")
         # else person has parents
         else: 
             # if 0 genes
@@ -183,23 +313,19 @@ def joint_probability(people, one_gene, two_genes, have_trait):
             if person not in one_gene and person not in two_genes:
                 # mom and dad don't pass the gene
                 dist_probability[person] = (1-prob_dad_passes)*(1-prob_mom_passes)*PROBS["trait"][gene[person]][trait[person]]
-                print(f"        WITH PARENTS DIST_PROB and NO genes: {dist_probability[person]} ")
 
             if person in one_gene:
                 # mom passes, but not dad OR dad passes, but not mom
                 dist_probability[person] = (prob_mom_passes*(1-prob_dad_passes) + prob_dad_passes*(1-prob_mom_passes))*PROBS["trait"][gene[person]][trait[person]]
-                print(f"        WITH PARENTS DIST_PROB and ONE gene: {dist_probability[person]} ")
 
             if person in two_genes:
                 # mom and dad pass the gene
                 dist_probability[person] = prob_mom_passes*prob_dad_passes*PROBS["trait"][gene[person]][trait[person]]
-                print(f"        WITH PARENTS DIST_PROB and TWO genes: {dist_probability[person]} ")
 
     probability = 1
     for person in dist_probability:
         # print(f"probab: {dist_probability[person]}")
         probability *= dist_probability[person]
-    print(f"probability: {probability}")
     return probability
 
 def inherit(parent, one_gene, two_genes):
@@ -211,18 +337,6 @@ def inherit(parent, one_gene, two_genes):
     else:
         return PROBS['mutation']
 
-    probability = 0
-
-    # probability that gene is passed
-    if passed:        
-        for genes in inherit_gene:
-            probability += inherit_gene[genes]
-    else: 
-        for genes in inherit_gene:
-            probability += 1- inherit_gene[genes]
-
-    return inherit_gene[genes]
-
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
     Add to `probabilities` a new joint probability `p`.
@@ -230,7 +344,6 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
     """
-    print(f"probabilites: {probabilities}")
 
     # initialize
     gene = dict()
@@ -267,7 +380,6 @@ def normalize(probabilities):
     trait_normalization = 0
 
     for person in probabilities:
-        print(f"PERSON: {person}")
         gene_normalization = sum(probabilities[person]["gene"].values())
         trait_normalization = sum(probabilities[person]["trait"].values())
         for gene in probabilities[person]["gene"]:
@@ -278,5 +390,21 @@ def normalize(probabilities):
     return
 
 
+# Inference methods by name, for the optional second argument
+METHODS = {
+    "elimination": eliminate_probabilities,
+    "junction": junction_probabilities,
+    "enumerate": enumerate_probabilities,
+    "batched": batch_probabilities,
+    "pruned": prune_probabilities
+}
+
+# Approximate inference methods by name, which take a sampling budget
+SAMPLERS = {
+    "weighting": weighting_probabilities,
+    "gibbs": gibbs_probabilities
+}
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
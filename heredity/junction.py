@@ -0,0 +1,170 @@
+import numpy as np
+
+from elimination import elimination_order, interaction_graph
+from factors import (
+    Factor, combine, person_factors, rescale, to_probabilities,
+    trait_likelihood
+)
+
+
+class JunctionTree():
+    """
+    Junction tree over the gene counts of a pedigree, compiled once from
+    `people` as returned by `heredity.load_data`.
+
+    There is one clique per person, made of that person and their
+    neighbors when they are eliminated in min-fill order, and it links to
+    the clique of the first of those neighbors eliminated after them.
+    Every person's factor goes to the clique of whichever of its people
+    is eliminated first, and known traits are kept apart as likelihoods
+    on each person's own clique, so they can be changed later.
+
+    Messages between cliques are computed on demand and cached. Changing
+    a trait only drops the cached messages leading away from that
+    person's clique, so later queries recompute just the messages on
+    their path to it. `computed` counts the messages computed so far.
+    """
+
+    def __init__(self, people, probs):
+        self.people = {person: dict(data) for person, data in people.items()}
+        self.probs = probs
+        self.computed = 0
+
+        factors = person_factors(people, probs, evidence=False)
+        order = elimination_order(factors)
+        position = {person: i for i, person in enumerate(order)}
+
+        # Cliques, indexed by the position of their person in the order
+        neighbors = interaction_graph(factors)
+        self.cliques = []
+        self.parent = []
+        for person in order:
+            around = neighbors.pop(person)
+            self.cliques.append((person,) + tuple(
+                sorted(around, key=position.get)
+            ))
+            self.parent.append(
+                position[min(around, key=position.get)] if around else None
+            )
+            for neighbor in around:
+                neighbors[neighbor].discard(person)
+                neighbors[neighbor].update(around - {neighbor})
+
+        self.links = [[] for _ in self.cliques]
+        for child, parent in enumerate(self.parent):
+            if parent is not None:
+                self.links[child].append(parent)
+                self.links[parent].append(child)
+
+        # Clique holding each person's evidence, and each clique's factors
+        self.home = position
+        self.assigned = [[] for _ in self.cliques]
+        for factor in factors:
+            first = min(factor.variables, key=position.get)
+            self.assigned[position[first]].append(factor)
+        self.potentials = [
+            self.potential(i) for i in range(len(self.cliques))
+        ]
+        self.messages = dict()
+
+    def potential(self, clique):
+        """
+        Return the product of the factors and trait likelihoods assigned
+        to `clique`, over the clique's people.
+        """
+        factors = list(self.assigned[clique])
+        person = self.cliques[clique][0]
+        trait = self.people[person]["trait"]
+        if trait is not None:
+            factors.append(Factor(
+                (person,), trait_likelihood(self.probs, trait)
+            ))
+        factors.append(Factor(
+            self.cliques[clique], np.ones((3,) * len(self.cliques[clique]))
+        ))
+        return combine(factors, self.cliques[clique])
+
+    def set_trait(self, person, trait):
+        """
+        Set the known trait of `person`, or forget it if `trait` is None,
+        and drop the cached messages that depend on it.
+        """
+        self.people[person]["trait"] = trait
+        home = self.home[person]
+        self.potentials[home] = self.potential(home)
+
+        # Messages leading away from home depend on its potential. If one
+        # is not cached, neither is any message beyond it.
+        frontier = [(home, other) for other in self.links[home]]
+        while frontier:
+            source, target = frontier.pop()
+            if self.messages.pop((source, target), None) is None:
+                continue
+            frontier.extend(
+                (target, other) for other in self.links[target]
+                if other != source
+            )
+
+    def message(self, source, target):
+        """
+        Return the message from clique `source` to its neighbor `target`,
+        computing any messages it needs that are not cached, deepest
+        first so that long chains do not recurse.
+        """
+        stack = [(source, target, False)]
+        while stack:
+            source, target, ready = stack.pop()
+            if (source, target) in self.messages:
+                continue
+            inputs = [
+                (other, source) for other in self.links[source]
+                if other != target
+            ]
+            if not ready:
+                stack.append((source, target, True))
+                stack.extend(
+                    (other, into, False) for other, into in inputs
+                    if (other, into) not in self.messages
+                )
+                continue
+            separator = tuple(
+                person for person in self.cliques[source]
+                if person in self.cliques[target]
+            )
+            self.messages[(source, target)] = rescale(combine(
+                [self.potentials[source]]
+                + [self.messages[key] for key in inputs],
+                separator
+            ))
+            self.computed += 1
+        return self.messages[(source, target)]
+
+    def calibrate(self):
+        """
+        Compute every message in both directions, so that every marginal
+        can be read off without computing any more.
+        """
+        for clique, links in enumerate(self.links):
+            for other in links:
+                self.message(clique, other)
+
+    def gene_marginal(self, person):
+        """
+        Return the unnormalised distribution of `person`'s gene count.
+        """
+        clique = self.home[person]
+        return combine(
+            [self.potentials[clique]]
+            + [self.message(other, clique) for other in self.links[clique]],
+            (person,)
+        ).table
+
+    def probabilities(self):
+        """
+        Return the gene and trait distribution of every person, in the
+        format `heredity.main` prints.
+        """
+        marginals = {
+            person: self.gene_marginal(person) for person in self.people
+        }
+        return to_probabilities(self.people, self.probs, marginals)
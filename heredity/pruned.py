@@ -0,0 +1,166 @@
+from factors import GENES, child_table
+
+
+def pedigree_order(people):
+    """
+    Return the people of `people` ordered so that everyone comes after
+    their parents.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        # Pedigrees are shallow, but walk up with a stack anyway
+        stack = [person]
+        while stack:
+            current = stack[-1]
+            parents = [
+                parent for parent in (
+                    people[current]["mother"], people[current]["father"]
+                )
+                if parent is not None and parent not in placed
+            ]
+            if parents:
+                stack.extend(parents)
+                continue
+            stack.pop()
+            if current not in placed:
+                placed.add(current)
+                order.append(current)
+
+    for person in people:
+        place(person)
+    return order
+
+
+def person_tables(people, probs, order):
+    """
+    Return, for each person of `order`, a function of the gene counts
+    assigned so far and the person's own gene count, giving the factor
+    that person adds to the joint probability: their gene probability
+    given their parents, times the likelihood of their known trait.
+    """
+    children = child_table(probs).tolist()
+    position = {person: i for i, person in enumerate(order)}
+    tables = []
+    for person in order:
+        trait = people[person]["trait"]
+        likelihood = [
+            1.0 if trait is None else probs["trait"][genes][trait]
+            for genes in GENES
+        ]
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is None and father is None:
+            table = [probs["gene"][genes] * likelihood[genes] for genes in GENES]
+            tables.append(lambda genes, g, table=table: table[g])
+            continue
+
+        # A blank parent has no gene, as in inherit
+        rows = [
+            [
+                [children[m][f][g] * likelihood[g] for g in GENES]
+                for f in GENES
+            ]
+            for m in GENES
+        ]
+        if mother is None or father is None:
+            parent = position[mother if father is None else father]
+            tables.append(
+                lambda genes, g, rows=rows, parent=parent:
+                rows[genes[parent]][0][g]
+            )
+        else:
+            m, f = position[mother], position[father]
+            tables.append(
+                lambda genes, g, rows=rows, m=m, f=f:
+                rows[genes[m]][genes[f]][g]
+            )
+    return tables
+
+
+def assignments(people, probs, order, stats=None):
+    """
+    Yield every assignment of gene counts to the people of `order` with a
+    nonzero joint probability, as a list of gene counts in that order and
+    the joint probability of those genes and the known traits.
+
+    Assignments are generated depth first, extending one person at a
+    time and keeping the partial product of each prefix, so peak memory
+    only grows with the number of people. A prefix whose product is zero,
+    such as one inconsistent with a known trait, is skipped with every
+    assignment below it. The yielded list is reused, so copy it to keep
+    it. If `stats` is given, it records how many assignments were yielded
+    and how many were skipped.
+    """
+    tables = person_tables(people, probs, order)
+    n = len(order)
+    if stats is not None:
+        stats["assignments"] = 0
+        stats["pruned"] = 0
+    if n == 0:
+        return
+
+    genes = [-1] * n
+    partial = [1.0] * n
+    level = 0
+    while level >= 0:
+        genes[level] += 1
+        if genes[level] == len(GENES):
+            genes[level] = -1
+            level -= 1
+            continue
+        p = partial[level] * tables[level](genes, genes[level])
+        if p == 0:
+            if stats is not None:
+                stats["pruned"] += len(GENES) ** (n - level - 1)
+            continue
+        if level == n - 1:
+            if stats is not None:
+                stats["assignments"] += 1
+            yield genes, p
+        else:
+            level += 1
+            partial[level] = p
+
+
+def pruned_probabilities(people, probs, stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`
+    by exact enumeration, like `heredity.enumerate_probabilities`, but
+    streaming only the assignments consistent with the known traits.
+
+    Known traits are fixed evidence rather than enumerated and rejected.
+    Unknown traits only depend on their own person's genes and sum out
+    to one, so they are not enumerated either: each gene assignment adds
+    its probability times P(trait | genes) to the person's trait total.
+    That leaves one evaluation per gene assignment instead of one per
+    gene and trait assignment.
+    """
+    order = pedigree_order(people)
+    has_trait = [probs["trait"][genes][True] for genes in GENES]
+    unknown = [
+        i for i, person in enumerate(order)
+        if people[person]["trait"] is None
+    ]
+    gene_totals = [[0.0] * len(GENES) for _ in order]
+    trait_totals = [0.0] * len(order)
+    total = 0.0
+    for genes, p in assignments(people, probs, order, stats):
+        total += p
+        for i, g in enumerate(genes):
+            gene_totals[i][g] += p
+        for i in unknown:
+            trait_totals[i] += p * has_trait[genes[i]]
+
+    probabilities = dict()
+    for i, person in enumerate(order):
+        trait = people[person]["trait"]
+        if trait is None:
+            has = trait_totals[i] / total
+        else:
+            has = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": {g: gene_totals[i][g] / total for g in (2, 1, 0)},
+            "trait": {True: has, False: 1 - has}
+        }
+    return {person: probabilities[person] for person in people}
@@ -0,0 +1,405 @@
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from factors import GENES, child_table, to_probabilities, trait_likelihood
+from pruned import pedigree_order
+
+# Likelihood weighting samples drawn together with NumPy
+BLOCK = 4096
+
+# Gibbs sweeps summarised together, for diagnostics and deadline checks
+BATCH = 50
+
+# Pedigree shared with the chains of a worker process, set by init_worker
+worker_pedigree = None
+
+
+class Pedigree():
+    """
+    Pedigree compiled for sampling gene counts, from `people` as returned
+    by `heredity.load_data`.
+
+    People are numbered parents first. A blank parent is numbered `n`,
+    one past the last person, and that slot always holds gene count 0,
+    the way inherit treats a parent in neither gene set.
+    """
+
+    def __init__(self, people, probs):
+        self.names = pedigree_order(people)
+        n = len(self.names)
+        position = {person: i for i, person in enumerate(self.names)}
+        self.founder = [
+            people[person]["mother"] is None
+            and people[person]["father"] is None
+            for person in self.names
+        ]
+        self.mothers = [
+            position.get(people[person]["mother"], n) for person in self.names
+        ]
+        self.fathers = [
+            position.get(people[person]["father"], n) for person in self.names
+        ]
+        self.prior = np.array([probs["gene"][genes] for genes in GENES])
+        self.children = child_table(probs)
+        self.likelihoods = np.array([
+            trait_likelihood(probs, people[person]["trait"])
+            for person in self.names
+        ])
+
+        # Each person's children, with the other parent and whether the
+        # person is their mother
+        self.kids = [[] for _ in self.names]
+        for child in range(n):
+            if self.founder[child]:
+                continue
+            mother, father = self.mothers[child], self.fathers[child]
+            if mother != n:
+                self.kids[mother].append((child, father, True))
+            if father != n and father != mother:
+                self.kids[father].append((child, mother, False))
+
+    def __len__(self):
+        return len(self.names)
+
+
+def init_worker(pedigree):
+    """
+    Make `pedigree` available to the chains of a worker process.
+    """
+    global worker_pedigree
+    worker_pedigree = pedigree
+
+
+def weighting_chain(pedigree, samples, seconds, seed):
+    """
+    Return the totals of one likelihood weighting chain of at most
+    `samples` samples, stopping early after `seconds` if given, though
+    never before one block of samples.
+
+    Gene counts are sampled forward, parents first, a block of samples at
+    a time, and each sample is weighted by the likelihood of the known
+    traits. Weights are kept relative to the largest log weight seen, so
+    that they do not underflow on large pedigrees. Return that log scale,
+    the weighted gene totals, the sum and sum of squares of the weights,
+    and the number of samples.
+    """
+    deadline = None if seconds is None else time.time() + seconds
+    rng = np.random.default_rng(seed)
+    n = len(pedigree)
+    people = np.arange(n)
+    log_likelihoods = np.log(pedigree.likelihoods)
+    cumulative_prior = np.cumsum(pedigree.prior)[:-1]
+    cumulative_children = np.cumsum(pedigree.children, axis=-1)[..., :-1]
+
+    scale = -np.inf
+    totals = np.zeros((n, len(GENES)))
+    weight_sum = 0.0
+    weight_squares = 0.0
+    count = 0
+    while count < samples and (
+        not count or deadline is None or time.time() < deadline
+    ):
+        size = min(BLOCK, samples - count)
+        genes = np.zeros((size, n + 1), dtype=np.int64)
+        draws = rng.random((size, n))
+        for i in range(n):
+            if pedigree.founder[i]:
+                bounds = cumulative_prior
+            else:
+                bounds = cumulative_children[
+                    genes[:, pedigree.mothers[i]], genes[:, pedigree.fathers[i]]
+                ]
+            genes[:, i] = (draws[:, i, None] > bounds).sum(axis=-1)
+
+        log_weights = log_likelihoods[people, genes[:, :n]].sum(axis=1)
+        largest = log_weights.max()
+        if largest > scale:
+            rescale = np.exp(scale - largest)
+            totals *= rescale
+            weight_sum *= rescale
+            weight_squares *= rescale ** 2
+            scale = largest
+        weights = np.exp(log_weights - scale)
+
+        totals += np.stack([
+            weights @ (genes[:, :n] == g) for g in GENES
+        ], axis=-1)
+        weight_sum += weights.sum()
+        weight_squares += (weights ** 2).sum()
+        count += size
+    return scale, totals, weight_sum, weight_squares, count
+
+
+def gibbs_chain(pedigree, samples, seconds, seed, burn_in):
+    """
+    Return the totals of one Gibbs sampling chain of at most `samples`
+    sweeps after `burn_in` sweeps, stopping early after `seconds` if
+    given, though never before one batch of sweeps.
+
+    The chain starts from a forward sample and, in each sweep, redraws
+    every person's gene count given their parents, their children and
+    the other parents of those children, and their known trait. Each
+    sweep adds that conditional distribution rather than the drawn gene
+    count, which has lower variance for the same cost. Return the gene
+    totals, the means of each batch of `BATCH` sweeps, the sum of
+    squares of the per-sweep distributions and the number of sweeps.
+    """
+    deadline = None if seconds is None else time.time() + seconds
+    rng = random.Random(seed)
+    n = len(pedigree)
+    children = pedigree.children.tolist()
+    own = [
+        (pedigree.prior * pedigree.likelihoods[i]).tolist()
+        for i in range(n)
+    ]
+    likelihoods = pedigree.likelihoods.tolist()
+    founder, mothers, fathers = (
+        pedigree.founder, pedigree.mothers, pedigree.fathers
+    )
+    kids = pedigree.kids
+
+    # Forward sample, ignoring the evidence
+    genes = [0] * (n + 1)
+    for i in range(n):
+        if founder[i]:
+            weights = pedigree.prior
+        else:
+            weights = children[genes[mothers[i]]][genes[fathers[i]]]
+        genes[i] = rng.choices(GENES, weights)[0]
+
+    def sweep():
+        distributions = []
+        for i in range(n):
+            if founder[i]:
+                p0, p1, p2 = own[i]
+            else:
+                row = children[genes[mothers[i]]][genes[fathers[i]]]
+                likelihood = likelihoods[i]
+                p0 = row[0] * likelihood[0]
+                p1 = row[1] * likelihood[1]
+                p2 = row[2] * likelihood[2]
+            for child, other, is_mother in kids[i]:
+                g = genes[child]
+                if is_mother:
+                    p0 *= children[0][genes[other]][g]
+                    p1 *= children[1][genes[other]][g]
+                    p2 *= children[2][genes[other]][g]
+                else:
+                    row = children[genes[other]]
+                    p0 *= row[0][g]
+                    p1 *= row[1][g]
+                    p2 *= row[2][g]
+            total = p0 + p1 + p2
+            p0, p1, p2 = p0 / total, p1 / total, p2 / total
+            draw = rng.random()
+            genes[i] = 0 if draw < p0 else 1 if draw < p0 + p1 else 2
+            distributions.append((p0, p1, p2))
+        return distributions
+
+    for _ in range(burn_in):
+        sweep()
+
+    totals = np.zeros((n, len(GENES)))
+    squares = np.zeros((n, len(GENES)))
+    batches = []
+    count = 0
+    while count < samples and (
+        not batches or deadline is None or time.time() < deadline
+    ):
+        size = min(BATCH, samples - count)
+        batch = np.array([sweep() for _ in range(size)]).reshape(
+            size, n, len(GENES)
+        )
+        totals += batch.sum(axis=0)
+        squares += (batch ** 2).sum(axis=0)
+        batches.append(batch.mean(axis=0))
+        count += size
+    return totals, np.array(batches), squares, count
+
+
+def run_chain(task):
+    """
+    Return the totals of one chain, given as a `(method, samples,
+    seconds, seed, burn_in)` task, on the worker's pedigree.
+    """
+    method, samples, seconds, seed, burn_in = task
+    if method == "gibbs":
+        return gibbs_chain(worker_pedigree, samples, seconds, seed, burn_in)
+    return weighting_chain(worker_pedigree, samples, seconds, seed)
+
+
+def chain_tasks(method, samples, seconds, chains, processes, seed, burn_in):
+    """
+    Split a budget of `samples` samples between `chains` chains, at
+    least one each, each with its own seed spawned from `seed`, so that
+    results with a sample budget depend only on `seed` and `chains`,
+    not on the number of processes. Chains on the same worker run one
+    after the other, so each gets its share of a time budget of
+    `seconds`.
+    """
+    if seconds is not None:
+        seconds = seconds * min(processes, chains) / chains
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    for i, chain_seed in enumerate(seeds):
+        if method == "gibbs":
+            chain_seed = int(chain_seed.generate_state(1)[0])
+        yield (
+            method,
+            max(samples // chains + (1 if i < samples % chains else 0), 1),
+            seconds, chain_seed, burn_in
+        )
+
+
+def run_chains(pedigree, method, samples, seconds, chains, processes, seed,
+               burn_in=0):
+    """
+    Return the totals of `chains` chains of `method` on `pedigree`, run
+    in a pool of `processes` workers.
+    """
+    if chains < 1:
+        raise ValueError("Sampling needs at least one chain.")
+    processes = min(processes or os.cpu_count(), chains)
+    tasks = list(chain_tasks(
+        method, samples, seconds, chains, processes, seed, burn_in
+    ))
+    if processes == 1:
+        init_worker(pedigree)
+        return [run_chain(task) for task in tasks]
+
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(pedigree,)
+    ) as pool:
+        return pool.map(run_chain, tasks, chunksize=1)
+
+
+def weighting_probabilities(people, probs, samples, seconds=None, chains=4,
+                            processes=None, seed=None, stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    in the format `heredity.main` prints, estimated by likelihood
+    weighting from at most `samples` samples, or fewer if `seconds` runs
+    out first, split between `chains` chains in parallel processes.
+
+    If `stats` is given, it records the number of samples, the effective
+    sample size of the weights and the largest standard error of a gene
+    probability.
+    """
+    start = time.perf_counter()
+    pedigree = Pedigree(people, probs)
+    results = run_chains(
+        pedigree, "weighting", samples, seconds, chains, processes, seed
+    )
+
+    # Bring every chain to the largest log scale
+    scale = max(result[0] for result in results)
+    totals = np.zeros((len(pedigree), len(GENES)))
+    weight_sum = weight_squares = 0.0
+    count = 0
+    for chain_scale, chain_totals, chain_sum, chain_squares, chain_count \
+            in results:
+        if chain_count:
+            factor = np.exp(chain_scale - scale)
+            totals += factor * chain_totals
+            weight_sum += factor * chain_sum
+            weight_squares += factor ** 2 * chain_squares
+        count += chain_count
+
+    estimates = totals / weight_sum
+    effective = float(weight_sum ** 2 / weight_squares)
+    if stats is not None:
+        stats.update({
+            "method": "likelihood weighting",
+            "chains": chains,
+            "samples": count,
+            "seconds": time.perf_counter() - start,
+            "effective_samples": effective,
+            "r_hat": None,
+            "standard_error": float(
+                np.sqrt(estimates * (1 - estimates) / effective).max()
+            )
+        })
+    marginals = {
+        person: totals[i] for i, person in enumerate(pedigree.names)
+    }
+    return to_probabilities(
+        people, probs, {person: marginals[person] for person in people}
+    )
+
+
+def gibbs_probabilities(people, probs, samples, seconds=None, chains=4,
+                        processes=None, seed=None, burn_in=100, stats=None):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    in the format `heredity.main` prints, estimated by Gibbs sampling
+    over gene counts from at most `samples` sweeps after `burn_in`
+    sweeps per chain, or fewer if `seconds` runs out first, split between
+    `chains` chains in parallel processes.
+
+    If `stats` is given, it records the number of sweeps, the largest
+    Gelman-Rubin R-hat of a gene probability across chains, the smallest
+    effective sample size and the largest standard error, both estimated
+    from batch means.
+    """
+    start = time.perf_counter()
+    pedigree = Pedigree(people, probs)
+    results = run_chains(
+        pedigree, "gibbs", samples, seconds, chains, processes, seed, burn_in
+    )
+
+    totals = sum(result[0] for result in results)
+    squares = sum(result[2] for result in results)
+    count = sum(result[3] for result in results)
+    estimates = totals / count
+
+    if stats is not None:
+        # Variance of single sweeps, and of the means of batches of them
+        variance = squares / count - estimates ** 2
+        batches = np.concatenate([result[1] for result in results])
+        batch_variance = batches.var(axis=0, ddof=1) if len(batches) > 1 \
+            else np.zeros_like(estimates)
+        varying = (variance > 1e-12) & (batch_variance > 0)
+        effective = count
+        if varying.any():
+            effective = min(count, float((
+                count * variance[varying]
+                / (count / len(batches) * batch_variance[varying])
+            ).min()))
+
+        # Between and within chain variances
+        r_hat = None
+        lengths = np.array([result[3] for result in results])
+        if len(results) > 1 and lengths.min() > 1:
+            means = np.array([result[0] / result[3] for result in results])
+            within = np.mean([
+                (result[2] - result[3] * mean ** 2) / (result[3] - 1)
+                for result, mean in zip(results, means)
+            ], axis=0)
+            length = lengths.mean()
+            pooled = (length - 1) / length * within + means.var(
+                axis=0, ddof=1
+            )
+            mixing = within > 1e-12
+            r_hat = float(np.sqrt(pooled[mixing] / within[mixing]).max()) \
+                if mixing.any() else 1.0
+
+        stats.update({
+            "method": "Gibbs sampling",
+            "chains": chains,
+            "samples": count,
+            "seconds": time.perf_counter() - start,
+            "effective_samples": effective,
+            "r_hat": r_hat,
+            "standard_error": float(
+                np.sqrt(batch_variance / max(len(batches), 1)).max()
+            )
+        })
+    marginals = {
+        person: totals[i] for i, person in enumerate(pedigree.names)
+    }
+    return to_probabilities(
+        people, probs, {person: marginals[person] for person in people}
+    )
@@ -0,0 +1,496 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from crawler import crawl_to_file
+from incremental import diff_graphs, warm_pagerank
+from personalized import PersonalizedPageRank
+from solvers import SOLVERS, solve
+from engine import (
+    LinkGraph, matrix_pagerank, power_iteration, sample_visits, sampled_pagerank
+)
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank
+from walkers import parallel_visits
+
+
+def random_graph(num_pages, average_links, seed):
+    """
+    Return a LinkGraph of `num_pages` pages, each linking to
+    `average_links` random other pages on average.
+    """
+    rng = np.random.default_rng(seed)
+    num_links = num_pages * average_links
+    sources = rng.integers(0, num_pages, num_links)
+    targets = rng.integers(0, num_pages, num_links)
+    return link_graph(num_pages, sources, targets)
+
+
+def scale_free_graph(num_pages, average_links, seed, exponent=2.1):
+    """
+    Return a LinkGraph of `num_pages` pages, each linking to
+    `average_links` other pages on average, whose in-degrees follow a
+    power law with `exponent`, as on the web.
+    """
+    rng = np.random.default_rng(seed)
+    num_links = num_pages * average_links
+    sources = rng.integers(0, num_pages, num_links)
+    # Page i is linked to with probability proportional to
+    # (i + 1) ** (-1 / (exponent - 1))
+    popularity = np.arange(1, num_pages + 1) ** (-1 / (exponent - 1))
+    targets = np.searchsorted(
+        np.cumsum(popularity), rng.random(num_links) * popularity.sum()
+    )
+    targets = np.minimum(targets, num_pages - 1)
+    return link_graph(num_pages, sources, targets)
+
+
+def clustered_graph(num_pages, average_links, seed, clusters=20):
+    """
+    Return a scale-free LinkGraph of `num_pages` pages split into
+    `clusters` clusters with no links between them, on which power
+    iteration converges as slowly as `damping_factor` allows.
+    """
+    graph = scale_free_graph(num_pages, average_links, seed)
+    cluster = graph.sources % clusters
+    targets = graph.targets - graph.targets % clusters + cluster
+    targets = np.minimum(targets, num_pages - 1)
+    return link_graph(num_pages, graph.sources, targets)
+
+
+def dangling_graph(num_pages, average_links, seed, fraction=0.5):
+    """
+    Return a random LinkGraph of `num_pages` pages in which `fraction`
+    of the pages have no links and the rest link to `average_links`
+    random other pages on average.
+    """
+    rng = np.random.default_rng(seed)
+    linking = max(int(num_pages * (1 - fraction)), 1)
+    num_links = linking * average_links
+    sources = rng.integers(0, linking, num_links)
+    targets = rng.integers(0, num_pages, num_links)
+    return link_graph(num_pages, sources, targets)
+
+
+def link_graph(num_pages, sources, targets):
+    """
+    Return a LinkGraph of `num_pages` pages with links from `sources[e]`
+    to `targets[e]`.
+    """
+    # Drop self-links and duplicate links, as crawl does
+    keep = sources != targets
+    edges = np.sort(sources[keep] * num_pages + targets[keep])
+    edges = edges[np.concatenate(([True], edges[1:] != edges[:-1]))]
+    return LinkGraph(
+        [f"{i}.html" for i in range(num_pages)],
+        edges // num_pages, edges % num_pages
+    )
+
+
+def write_corpus(graph, directory):
+    """
+    Write `graph` to `directory` as one HTML page per page of the graph.
+    """
+    offsets, targets = graph.outlinks()
+    for i, page in enumerate(graph.pages):
+        links = "".join(
+            f'        <li><a href="{graph.pages[target]}">{target}</a></li>\n'
+            for target in targets[offsets[i]:offsets[i + 1]].tolist()
+        )
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html lang=\"en\">\n"
+                f"    <head>\n        <title>{i}</title>\n    </head>\n"
+                f"    <body>\n    <ul>\n{links}    </ul>\n"
+                "    </body>\n</html>\n"
+            )
+
+
+# Graph generators by name, each called as generator(pages, links, seed)
+GENERATORS = {
+    "random": random_graph,
+    "scale-free": scale_free_graph,
+    "clustered": clustered_graph,
+    "dangling": dangling_graph
+}
+
+
+def reference(args):
+    for directory in args.corpora:
+        corpus = crawl(directory)
+        expected = iterate_pagerank(corpus, DAMPING)
+        actual = matrix_pagerank(corpus, DAMPING)
+        difference = max(abs(expected[page] - actual[page]) for page in corpus)
+        print(f"{directory}: {len(corpus)} pages, "
+              f"largest difference {difference:.2e}")
+        if difference > 1e-12:
+            sys.exit(f"Engine does not match iterate_pagerank on {directory}.")
+
+
+def scale(args):
+    for num_pages in args.sizes:
+        start = time.perf_counter()
+        graph = random_graph(num_pages, args.links, args.seed)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rank = power_iteration(graph, DAMPING, args.tolerance)
+        solve = time.perf_counter() - start
+
+        print(f"{num_pages} pages, {len(graph.sources)} links: "
+              f"build {build:.2f}s, solve {solve:.2f}s, "
+              f"sum of ranks {rank.sum():.6f}")
+
+
+def sample(args):
+    for directory in args.corpora:
+        corpus = crawl(directory)
+        exact = matrix_pagerank(corpus, DAMPING, 1e-10)
+
+        start = time.perf_counter()
+        expected = sample_pagerank(corpus, DAMPING, args.reference_samples)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = sampled_pagerank(corpus, DAMPING, args.samples, args.seed)
+        sampler_time = time.perf_counter() - start
+
+        print(f"{directory}: sample_pagerank {args.reference_samples} samples "
+              f"in {reference_time:.2f}s (error {error(expected, exact):.4f}), "
+              f"sampler {args.samples} samples in {sampler_time:.2f}s "
+              f"(error {error(actual, exact):.4f})")
+
+    for num_pages in args.sizes:
+        graph = random_graph(num_pages, 10, args.seed)
+        start = time.perf_counter()
+        visits = sample_visits(graph, DAMPING, args.samples, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{num_pages} random pages: {args.samples} samples "
+              f"in {elapsed:.2f}s ({args.samples / elapsed:.0f} samples/s), "
+              f"{visits.sum()} visits counted")
+
+
+def walkers(args):
+    if args.corpus is None:
+        graph = random_graph(args.pages, 10, args.seed)
+        name = f"{args.pages} random pages"
+    else:
+        graph = LinkGraph.from_corpus(crawl(args.corpus))
+        name = args.corpus
+    exact = power_iteration(graph, DAMPING, 1e-12)
+
+    # Variance of the estimator across independently seeded runs
+    print(f"{name}, {args.walkers} walkers, {args.repeats} runs per size:")
+    for samples in args.samples:
+        estimates = np.array([
+            parallel_visits(
+                graph, DAMPING, samples, args.walkers, args.processes[-1],
+                (args.seed, repeat)
+            ) / samples
+            for repeat in range(args.repeats)
+        ])
+        variance = estimates.var(axis=0).sum()
+        l1 = np.abs(estimates - exact).sum(axis=1).mean()
+        print(f"  {samples} samples: variance {variance:.3e}, "
+              f"mean L1 error {l1:.4f}")
+
+    # Throughput as the pool grows
+    samples = args.samples[-1]
+    for processes in args.processes:
+        start = time.perf_counter()
+        parallel_visits(
+            graph, DAMPING, samples, args.walkers, processes, args.seed
+        )
+        elapsed = time.perf_counter() - start
+        print(f"  {processes} processes: {samples} samples in {elapsed:.2f}s "
+              f"({samples / elapsed:.0f} samples/s)")
+
+
+def crawling(args):
+    graph = random_graph(args.pages, args.links, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(graph, directory)
+
+        start = time.perf_counter()
+        corpus = crawl(directory)
+        crawl_time = time.perf_counter() - start
+        print(f"{args.pages} pages: crawl in {crawl_time:.2f}s")
+
+        for processes in args.processes:
+            start = time.perf_counter()
+            path, _, num_edges = crawl_to_file(
+                directory, os.path.join(directory, "links.edges"), processes
+            )
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            crawled = LinkGraph.from_edge_file(path)
+            load = time.perf_counter() - start
+            print(f"  {processes} processes: crawl_to_file in {elapsed:.2f}s, "
+                  f"{num_edges} links, LinkGraph loaded in {load:.2f}s")
+
+            links = {
+                (crawled.pages[source], crawled.pages[target])
+                for source, target in zip(
+                    crawled.sources.tolist(), crawled.targets.tolist()
+                )
+            }
+            expected = {
+                (page, link) for page in corpus for link in corpus[page]
+            }
+            if links != expected:
+                sys.exit("Edge file does not match crawl.")
+
+
+def rewire(graph, count, links, seed):
+    """
+    Return a copy of `graph` in which `count` random pages link to
+    `links` new random pages instead of their old links.
+    """
+    rng = np.random.default_rng(seed)
+    n = graph.num_pages()
+    edited = rng.choice(n, count, replace=False)
+    keep = ~np.isin(graph.sources, edited)
+    sources = np.repeat(edited, links)
+    targets = rng.integers(0, n, len(sources))
+    keep_new = sources != targets
+    edges = np.unique(np.concatenate((
+        graph.sources[keep] * n + graph.targets[keep],
+        sources[keep_new] * n + targets[keep_new]
+    )))
+    return LinkGraph(graph.pages, edges // n, edges % n)
+
+
+def incremental(args):
+    graph = random_graph(args.pages, args.links, args.seed)
+    old_rank = power_iteration(graph, DAMPING, args.tolerance)
+    for count in args.edits:
+        edited = rewire(graph, count, args.links, args.seed + count)
+        changes = diff_graphs(graph, edited)
+        exact = power_iteration(edited, DAMPING, 1e-14)
+        print(f"{args.pages} pages, {count} pages rewired "
+              f"({changes['links_added']} links added, "
+              f"{changes['links_removed']} removed, "
+              f"{len(changes['touched'])} pages with new incoming links):")
+
+        stats = {}
+        start = time.perf_counter()
+        rank = power_iteration(edited, DAMPING, args.tolerance, stats=stats)
+        elapsed = time.perf_counter() - start
+        print(f"  cold:  {stats['iterations']} iterations in {elapsed:.3f}s, "
+              f"L1 error {np.abs(rank - exact).sum():.2e}")
+
+        start = time.perf_counter()
+        rank = warm_pagerank(
+            graph, old_rank, edited, DAMPING, args.tolerance, changes, stats
+        )
+        elapsed = time.perf_counter() - start
+        print(f"  warm:  {stats['iterations']} iterations in {elapsed:.3f}s, "
+              f"L1 error {np.abs(rank - exact).sum():.2e}")
+
+
+def solvers(args):
+    # Every solver should reach the tolerance on the distribution corpora
+    for directory in args.corpora:
+        graph = LinkGraph.from_corpus(crawl(directory))
+        exact = solve(graph, DAMPING, "jacobi", 1e-14)
+        for name in args.solvers:
+            stats = {}
+            rank = solve(graph, DAMPING, name, args.tolerance, stats=stats)
+            error = np.abs(rank - exact).sum()
+            print(f"{directory}: {name} in {stats['iterations']} "
+                  f"iterations, L1 error {error:.1e}")
+            if not error <= 10 * args.tolerance:
+                sys.exit(f"{name} does not converge on {directory}.")
+
+    for kind in args.graphs:
+        graph = GENERATORS[kind](args.pages, args.links, args.seed)
+        exact = solve(graph, DAMPING, "jacobi", 1e-14)
+        print(f"{args.pages} pages, {kind}, tolerance {args.tolerance}:")
+        for name in args.solvers:
+            stats = {}
+            rank = solve(graph, DAMPING, name, args.tolerance, stats=stats)
+            residuals = ", ".join(
+                f"{residual:.1e}" for residual in stats["residuals"][:8]
+            )
+            print(f"  {name:>13}: {stats['iterations']:3} iterations "
+                  f"in {stats['times'][-1]:.3f}s, "
+                  f"L1 error {np.abs(rank - exact).sum():.1e}, "
+                  f"residuals {residuals}, ...")
+
+
+def personalized(args):
+    graph = scale_free_graph(args.pages, args.links, args.seed)
+    start = time.perf_counter()
+    ppr = PersonalizedPageRank(graph, DAMPING)
+    elapsed = time.perf_counter() - start
+    print(f"{args.pages} scale-free pages: preprocessed in {elapsed:.2f}s")
+
+    rng = np.random.default_rng(args.seed)
+    seed_sets = [
+        [graph.pages[page] for page in rng.integers(0, args.pages, size)]
+        for size in rng.integers(1, args.seeds + 1, args.queries)
+    ]
+    # Reference ranks from a push with a far smaller epsilon, which
+    # are off by at most the residual it leaves
+    exact = []
+    leftover = 0
+    for seeds in seed_sets:
+        stats = {}
+        exact.append(ppr.push(seeds, args.reference, stats))
+        leftover = max(leftover, stats["residual"])
+    print(f"  reference: push with epsilon {args.reference:g}, "
+          f"residual at most {leftover:.1e}")
+
+    for epsilon in args.epsilons:
+        latencies = []
+        overlap = 0
+        for seeds, row in zip(seed_sets, exact):
+            start = time.perf_counter()
+            rank = ppr.push(seeds, epsilon)
+            latencies.append(time.perf_counter() - start)
+            overlap += len(
+                set(ppr.ranks(rank, args.top)) & set(ppr.ranks(row, args.top))
+            )
+        latencies = 1000 * np.array(latencies)
+        print(f"  push, epsilon {epsilon:g}: "
+              f"median {np.median(latencies):.1f}ms, "
+              f"p99 {np.percentile(latencies, 99):.1f}ms, "
+              f"top {args.top} agreement "
+              f"{overlap / (args.top * args.queries):.0%}")
+
+
+def error(estimate, exact):
+    """
+    Return the largest absolute difference between two rank dictionaries.
+    """
+    return max(abs(estimate[page] - exact[page]) for page in exact)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for pagerank.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_reference = commands.add_parser(
+        "reference", help="check the engine against iterate_pagerank"
+    )
+    parser_reference.add_argument(
+        "corpora", nargs="*", default=["corpus0", "corpus1", "corpus2"]
+    )
+    parser_reference.set_defaults(run=reference)
+
+    parser_scale = commands.add_parser(
+        "scale", help="time the engine on random graphs"
+    )
+    parser_scale.add_argument(
+        "--sizes", type=int, nargs="+", default=[10 ** 4, 10 ** 5, 10 ** 6]
+    )
+    parser_scale.add_argument("--links", type=int, default=10,
+                              help="average links per page")
+    parser_scale.add_argument("--tolerance", type=float, default=1e-6)
+    parser_scale.add_argument("--seed", type=int, default=0)
+    parser_scale.set_defaults(run=scale)
+
+    parser_sample = commands.add_parser(
+        "sample", help="compare sample_pagerank with the O(1)-step sampler"
+    )
+    parser_sample.add_argument(
+        "corpora", nargs="*", default=["corpus0", "corpus1", "corpus2"]
+    )
+    parser_sample.add_argument("--samples", type=int, default=10 ** 7)
+    parser_sample.add_argument("--reference-samples", type=int,
+                               default=10 ** 5)
+    parser_sample.add_argument(
+        "--sizes", type=int, nargs="+", default=[10 ** 5, 10 ** 6]
+    )
+    parser_sample.add_argument("--seed", type=int, default=0)
+    parser_sample.set_defaults(run=sample)
+
+    parser_walkers = commands.add_parser(
+        "walkers", help="estimator variance and scaling of parallel walkers"
+    )
+    parser_walkers.add_argument("--corpus",
+                                help="corpus directory (default: random graph)")
+    parser_walkers.add_argument("--pages", type=int, default=10 ** 5)
+    parser_walkers.add_argument("--walkers", type=int, default=64)
+    parser_walkers.add_argument(
+        "--samples", type=int, nargs="+", default=[10 ** 5, 10 ** 6, 10 ** 7]
+    )
+    parser_walkers.add_argument("--repeats", type=int, default=5)
+    parser_walkers.add_argument(
+        "--processes", type=int, nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1})
+    )
+    parser_walkers.add_argument("--seed", type=int, default=0)
+    parser_walkers.set_defaults(run=walkers)
+
+    parser_crawl = commands.add_parser(
+        "crawl", help="compare crawl with the streaming crawler"
+    )
+    parser_crawl.add_argument("--pages", type=int, default=10 ** 5)
+    parser_crawl.add_argument("--links", type=int, default=10)
+    parser_crawl.add_argument(
+        "--processes", type=int, nargs="+",
+        default=sorted({1, os.cpu_count() or 1})
+    )
+    parser_crawl.add_argument("--seed", type=int, default=0)
+    parser_crawl.set_defaults(run=crawling)
+
+    parser_incremental = commands.add_parser(
+        "incremental", help="warm-start and push updates after small edits"
+    )
+    parser_incremental.add_argument("--pages", type=int, default=10 ** 5)
+    parser_incremental.add_argument("--links", type=int, default=10)
+    parser_incremental.add_argument(
+        "--edits", type=int, nargs="+", default=[1, 10, 100, 1000]
+    )
+    parser_incremental.add_argument("--tolerance", type=float, default=1e-10)
+    parser_incremental.add_argument("--seed", type=int, default=0)
+    parser_incremental.set_defaults(run=incremental)
+
+    parser_solvers = commands.add_parser(
+        "solvers", help="compare iteration counts and times of the solvers"
+    )
+    parser_solvers.add_argument("--pages", type=int, default=10 ** 5)
+    parser_solvers.add_argument("--links", type=int, default=10)
+    parser_solvers.add_argument(
+        "--graphs", nargs="+", choices=list(GENERATORS),
+        default=["random", "scale-free", "clustered"]
+    )
+    parser_solvers.add_argument(
+        "--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS)
+    )
+    parser_solvers.add_argument(
+        "--corpora", nargs="*", default=["corpus0", "corpus1", "corpus2"]
+    )
+    parser_solvers.add_argument("--tolerance", type=float, default=1e-8)
+    parser_solvers.add_argument("--seed", type=int, default=0)
+    parser_solvers.set_defaults(run=solvers)
+
+    parser_personalized = commands.add_parser(
+        "personalized", help="latency and accuracy of personalized PageRank"
+    )
+    parser_personalized.add_argument("--pages", type=int, default=10 ** 5)
+    parser_personalized.add_argument("--links", type=int, default=10)
+    parser_personalized.add_argument("--queries", type=int, default=50)
+    parser_personalized.add_argument("--seeds", type=int, default=3,
+                                     help="most seed pages per query")
+    parser_personalized.add_argument(
+        "--epsilons", type=float, nargs="+", default=[1e-4, 1e-5, 1e-6]
+    )
+    parser_personalized.add_argument("--reference", type=float,
+                                     default=1e-10,
+                                     help="epsilon of the reference push")
+    parser_personalized.add_argument("--top", type=int, default=10)
+    parser_personalized.add_argument("--seed", type=int, default=0)
+    parser_personalized.set_defaults(run=personalized)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
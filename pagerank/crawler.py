@@ -0,0 +1,135 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+
+from edgefile import EDGE_FILE, EdgeWriter
+
+# Same pattern as crawl, matched against the raw bytes of a page
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from a page at a time
+CHUNK_SIZE = 1 << 16
+
+# Longest link tag that can be split between two chunks and still found
+MAX_TAG = 1 << 12
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in the HTML file `path`, as UTF-8
+    encoded bytes, reading it `chunk_size` bytes at a time without
+    decoding it.
+
+    A tag can be split between two chunks, so the bytes from the last
+    `<` of a chunk are carried over and searched again with the next
+    one, as long as that `<` is within the last `MAX_TAG` bytes. Links
+    are collected in a set, so a link found twice is harmless.
+    """
+    links = set()
+    carry = b""
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return links
+            text = carry + chunk
+            links.update(LINK.findall(text))
+            start = text.rfind(b"<", max(len(text) - MAX_TAG, 0))
+            carry = text[start:] if start >= 0 else b""
+
+
+# UTF-8 encoded page name to id of the corpus being crawled, set by
+# init_worker
+worker_index = None
+
+
+def init_worker(index):
+    global worker_index
+    worker_index = index
+
+
+def page_links(task):
+    """
+    Return the sorted ids of the pages linked to by one page, given as
+    a `(path, page_id)` task. Uses the page index of the worker process.
+    """
+    path, page_id = task
+    targets = {
+        worker_index[link] for link in extract_links(path)
+        if link in worker_index
+    }
+    targets.discard(page_id)
+    return page_id, sorted(targets)
+
+
+def list_pages(directory):
+    """
+    Return the sorted names of the HTML pages in `directory`. A page's
+    id is its position in the list.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(
+            entry.name for entry in entries
+            if entry.name.endswith(".html") and entry.is_file()
+        )
+
+
+def crawl_to_file(directory, output=None, processes=None, chunk_size=64):
+    """
+    Extract the links of every page in `directory` in a pool of
+    `processes` workers and stream them to an edge file, by default
+    `links.edges` in `directory`. Pages are parsed `chunk_size` at a
+    time per worker. Returns the path of the edge file, and the number
+    of pages and of links.
+    """
+    if output is None:
+        output = os.path.join(directory, EDGE_FILE)
+    pages = list_pages(directory)
+    index = {page.encode("utf-8"): i for i, page in enumerate(pages)}
+    tasks = (
+        (os.path.join(directory, page), i) for i, page in enumerate(pages)
+    )
+
+    with EdgeWriter(output, pages) as writer:
+        if processes == 1:
+            init_worker(index)
+            for source, targets in map(page_links, tasks):
+                writer.write(source, targets)
+        else:
+            with multiprocessing.Pool(
+                processes, initializer=init_worker, initargs=(index,)
+            ) as pool:
+                for source, targets in pool.imap(
+                    page_links, tasks, chunksize=chunk_size
+                ):
+                    writer.write(source, targets)
+        num_edges = writer.num_edges
+
+    return output, len(pages), num_edges
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a corpus of HTML pages into an edge file that "
+        "the rank engines can memory-map."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--output",
+                        help=f"edge file (default: {EDGE_FILE} in the corpus)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    output, num_pages, num_edges = crawl_to_file(
+        args.directory, args.output, args.processes
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Crawled {num_pages} pages and {num_edges} links "
+          f"in {elapsed:.2f}s into {output}.")
+
+
+if __name__ == "__main__":
+    main()
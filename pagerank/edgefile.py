@@ -0,0 +1,137 @@
+import mmap
+import struct
+from array import array
+
+import numpy as np
+
+# Default name of the edge file written next to a corpus
+EDGE_FILE = "links.edges"
+
+MAGIC = b"PRLINKS2"
+
+# Number of pages and number of edges, after the magic number
+COUNTS = struct.Struct("<qq")
+HEADER_SIZE = len(MAGIC) + COUNTS.size
+
+# Page names never contain newlines, so they separate the names
+SEPARATOR = "\n"
+
+EDGE_DTYPE = np.dtype("<i4")
+
+# Edges buffered by EdgeWriter before they are written out
+BUFFER_EDGES = 1 << 20
+
+
+class EdgeWriter():
+    """
+    Streams a link graph to an edge file.
+
+    The file is an 8-byte magic number, the number of pages and of edges
+    as little-endian 64-bit integers, the source of every edge and then
+    the target of every edge as 32-bit page ids, with edges sorted by
+    target, then the page names separated by newlines. Sorted by target,
+    the edges are in the order `LinkGraph` keeps them, so a graph loaded
+    from the file uses memory-mapped views of it rather than copies.
+
+    Edges are written as they are found, as (source, target) pairs, so
+    they are not held in memory while crawling. `close` fills in the
+    counts and rearranges the pairs in place into the sorted arrays.
+    """
+
+    def __init__(self, path, pages):
+        self.path = path
+        self.pages = list(pages)
+        self.num_edges = 0
+        self.buffer = array("i")
+        self.file = open(path, "w+b")
+        self.file.write(MAGIC + COUNTS.pack(0, 0))
+
+    def write(self, source, targets):
+        """
+        Append links from page id `source` to each page id in `targets`.
+        """
+        for target in targets:
+            self.buffer.append(source)
+            self.buffer.append(target)
+        self.num_edges += len(targets)
+        if len(self.buffer) >= 2 * BUFFER_EDGES:
+            self.flush()
+
+    def flush(self):
+        self.file.write(
+            np.frombuffer(self.buffer, dtype=np.int32).astype(EDGE_DTYPE)
+            .tobytes()
+        )
+        self.buffer = array("i")
+
+    def close(self):
+        self.flush()
+        self.file.write(SEPARATOR.join(self.pages).encode("utf-8"))
+        self.file.seek(len(MAGIC))
+        self.file.write(COUNTS.pack(len(self.pages), self.num_edges))
+        self.file.flush()
+        if self.num_edges:
+            data = mmap.mmap(self.file.fileno(), 0)
+            edges = np.frombuffer(
+                data, dtype=EDGE_DTYPE, count=2 * self.num_edges,
+                offset=HEADER_SIZE
+            )
+            pairs = edges.reshape(self.num_edges, 2)
+            order = np.argsort(pairs[:, 1], kind="stable")
+            sources = pairs[order, 0]
+            targets = pairs[order, 1]
+            edges[:self.num_edges] = sources
+            edges[self.num_edges:] = targets
+            del edges, pairs
+            data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_edges(path, pages, sources, targets):
+    """
+    Write the graph of `pages` with links from `sources[e]` to
+    `targets[e]` to the edge file `path`.
+    """
+    sources = np.asarray(sources, dtype=EDGE_DTYPE)
+    targets = np.asarray(targets, dtype=EDGE_DTYPE)
+    if np.any(targets[1:] < targets[:-1]):
+        order = np.argsort(targets, kind="stable")
+        sources = sources[order]
+        targets = targets[order]
+    with open(path, "wb") as f:
+        f.write(MAGIC + COUNTS.pack(len(pages), len(sources)))
+        f.write(sources.tobytes())
+        f.write(targets.tobytes())
+        f.write(SEPARATOR.join(pages).encode("utf-8"))
+
+
+def read_edges(path):
+    """
+    Return the page names, sources and targets stored in the edge file
+    `path`, with edges sorted by target. Sources and targets are
+    memory-mapped views of the file.
+    """
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an edge file")
+    num_pages, num_edges = COUNTS.unpack_from(data, len(MAGIC))
+
+    size = EDGE_DTYPE.itemsize * num_edges
+    sources = np.frombuffer(
+        data, dtype=EDGE_DTYPE, count=num_edges, offset=HEADER_SIZE
+    )
+    targets = np.frombuffer(
+        data, dtype=EDGE_DTYPE, count=num_edges, offset=HEADER_SIZE + size
+    )
+    names = data[HEADER_SIZE + 2 * size:].decode("utf-8")
+    pages = names.split(SEPARATOR) if num_pages else []
+    if len(pages) != num_pages:
+        raise ValueError(f"{path} is truncated")
+    return pages, sources, targets
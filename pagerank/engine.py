@@ -0,0 +1,194 @@
+import numpy as np
+
+from edgefile import read_edges
+
+
+class LinkGraph():
+    """
+    Directed graph of pages, stored as NumPy arrays of edges.
+
+    Page `i` is `pages[i]`. Edge `e` is a link from `sources[e]` to
+    `targets[e]`. Edges are sorted by target, so the incoming links of
+    every page are contiguous, as in a CSR transition matrix whose rows
+    are targets. `weights[e]` is the transition probability of edge `e`,
+    one over the out-degree of its source.
+    """
+
+    def __init__(self, pages, sources, targets):
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+
+        # Edges already in target order, as in an edge file, are kept as
+        # they are, so memory-mapped int32 views are not copied
+        sources = np.asarray(sources)
+        targets = np.asarray(targets)
+        if sources.dtype.kind not in "iu":
+            sources = sources.astype(np.int64)
+        if targets.dtype.kind not in "iu":
+            targets = targets.astype(np.int64)
+        if np.any(targets[1:] < targets[:-1]):
+            order = np.argsort(targets, kind="stable")
+            sources = sources[order]
+            targets = targets[order]
+        self.sources = sources
+        self.targets = targets
+
+        n = len(self.pages)
+        self.out_degree = np.bincount(self.sources, minlength=n)
+        self.dangling = np.flatnonzero(self.out_degree == 0)
+        self.weights = 1.0 / self.out_degree[self.sources]
+
+        # Outgoing links grouped by source, built by outlinks
+        self.source_offsets = None
+        self.source_targets = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a graph from a corpus as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = []
+        targets = []
+        for page in pages:
+            for link in corpus[page]:
+                sources.append(index[page])
+                targets.append(index[link])
+        return cls(pages, sources, targets)
+
+    @classmethod
+    def from_edge_file(cls, path):
+        """
+        Build a graph from an edge file written by `crawler.py`.
+        """
+        return cls(*read_edges(path))
+
+    def num_pages(self):
+        return len(self.pages)
+
+    def outlinks(self):
+        """
+        Return CSR offsets and targets of the outgoing links: the links
+        of page `i` are `targets[offsets[i]:offsets[i + 1]]`.
+        """
+        if self.source_offsets is None:
+            order = np.argsort(self.sources, kind="stable")
+            self.source_targets = self.targets[order]
+            self.source_offsets = np.concatenate(
+                ([0], np.cumsum(self.out_degree))
+            )
+        return self.source_offsets, self.source_targets
+
+    def multiply(self, rank):
+        """
+        Return the rank each page receives through its incoming links
+        when every page splits `rank` evenly among its outgoing links.
+        """
+        return np.bincount(
+            self.targets,
+            weights=rank[self.sources] * self.weights,
+            minlength=self.num_pages()
+        )
+
+    def step(self, rank, damping_factor):
+        """
+        Return one power-iteration step of the PageRank formula from
+        `rank`. Pages without links spread their rank over every page,
+        which is added as a single scalar rather than as dense rows.
+        """
+        n = self.num_pages()
+        dangling_mass = rank[self.dangling].sum()
+        return (1 - damping_factor) / n + damping_factor * (
+            self.multiply(rank) + dangling_mass / n
+        )
+
+    def ranks(self, rank):
+        """
+        Return the dictionary mapping each page to its entry of `rank`.
+        """
+        return dict(zip(self.pages, rank.tolist()))
+
+
+def power_iteration(graph, damping_factor, tolerance=0.001,
+                    max_iterations=None, rank=None, stats=None):
+    """
+    Return the PageRank vector of `graph` by power iteration from `rank`,
+    or from the uniform vector, stopping once no page's value changes by
+    more than `tolerance` in an iteration, or after `max_iterations`
+    iterations. If `stats` is given, records the number of iterations.
+    """
+    n = graph.num_pages()
+    if rank is None:
+        rank = np.full(n, 1 / n)
+    iterations = 0
+    while True:
+        new_rank = graph.step(rank, damping_factor)
+        iterations += 1
+        difference = np.abs(new_rank - rank).max()
+        rank = new_rank
+        if difference <= tolerance:
+            break
+        if max_iterations is not None and iterations >= max_iterations:
+            break
+    if stats is not None:
+        stats["iterations"] = iterations
+    return rank
+
+
+def sample_visits(graph, damping_factor, n, seed=None, block=65536):
+    """
+    Return an array counting how many of `n` samples of a random surfer
+    on `graph` land on each page, starting at a random page.
+
+    Each step takes O(1) time. With probability `damping_factor` the
+    surfer follows a uniformly chosen outgoing link, read straight from
+    the page's slice of the outlink arrays; otherwise, or from a page
+    without links, it jumps to a uniformly chosen page. That is exactly
+    the distribution of `transition_model`. Random numbers are drawn
+    `block` steps at a time.
+    """
+    rng = np.random.default_rng(seed)
+    num_pages = graph.num_pages()
+    offsets, targets = graph.outlinks()
+    offsets = offsets.tolist()
+    targets = targets.tolist()
+    visits = [0] * num_pages
+
+    page = int(rng.integers(num_pages))
+    visits[page] += 1
+    remaining = n - 1
+    while remaining > 0:
+        size = min(block, remaining)
+        follows = (rng.random(size) < damping_factor).tolist()
+        jumps = rng.integers(0, num_pages, size).tolist()
+        picks = rng.random(size).tolist()
+        for follow, jump, pick in zip(follows, jumps, picks):
+            start = offsets[page]
+            degree = offsets[page + 1] - start
+            if follow and degree:
+                page = targets[start + int(pick * degree)]
+            else:
+                page = jump
+            visits[page] += 1
+        remaining -= size
+
+    return np.array(visits, dtype=np.int64)
+
+
+def sampled_pagerank(corpus, damping_factor, n, seed=None):
+    """
+    Return PageRank values for each page of `corpus`, as
+    `sample_pagerank` does, from `n` samples taken by `sample_visits`.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.ranks(sample_visits(graph, damping_factor, n, seed) / n)
+
+
+def matrix_pagerank(corpus, damping_factor, tolerance=0.001):
+    """
+    Return PageRank values for each page of `corpus`, as
+    `iterate_pagerank` does, using vectorised power iteration.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.ranks(power_iteration(graph, damping_factor, tolerance))
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmark import GENERATORS, write_corpus
+from crawler import crawl_to_file
+from edgefile import write_edges
+from engine import LinkGraph, sample_visits
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank
+from solvers import SOLVERS, solve
+
+
+def run_stage(stages, name, function, *args, memory=True):
+    """
+    Run `function(*args)`, record its wall time in `stages[name]` and
+    return its result. If `memory` is true, runs it a second time under
+    tracemalloc to record its peak allocation, so that tracing does not
+    slow the timed run. Only this process is traced, not pool workers.
+    """
+    print(f"  {name}...", file=sys.stderr)
+    start = time.perf_counter()
+    result = function(*args)
+    stages[name] = {"seconds": time.perf_counter() - start}
+    if memory:
+        tracemalloc.start()
+        function(*args)
+        stages[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_case(args, kind, num_pages, directory):
+    """
+    Generate one corpus and return the timings of every stage over it.
+    """
+    stages = dict()
+    memory = not args.no_memory
+    graph = run_stage(
+        stages, "generate", GENERATORS[kind], num_pages, args.links,
+        args.seed, memory=memory
+    )
+    edge_file = os.path.join(directory, "links.edges")
+
+    if args.format == "html":
+        run_stage(stages, "write_html", write_corpus, graph, directory,
+                  memory=memory)
+        corpus = run_stage(stages, "crawl", crawl, directory, memory=memory)
+        run_stage(stages, "crawl_to_file", crawl_to_file, directory,
+                  edge_file, args.processes, memory=memory)
+    else:
+        corpus = None
+        run_stage(stages, "write_edges", write_edges, edge_file,
+                  graph.pages, graph.sources, graph.targets, memory=memory)
+    graph = run_stage(stages, "load_edges", LinkGraph.from_edge_file,
+                      edge_file, memory=memory)
+
+    for name in args.solvers:
+        run_stage(stages, f"solve_{name}", solve, graph, DAMPING, name,
+                  args.tolerance, memory=memory)
+    run_stage(stages, "sample_visits", sample_visits, graph, DAMPING,
+              args.samples, args.seed, memory=memory)
+
+    # The reference implementations are quadratic in the number of pages
+    if num_pages <= args.reference_limit:
+        if corpus is None:
+            offsets, targets = graph.outlinks()
+            corpus = {
+                page: {
+                    graph.pages[target]
+                    for target in targets[offsets[i]:offsets[i + 1]].tolist()
+                }
+                for i, page in enumerate(graph.pages)
+            }
+        run_stage(stages, "iterate_pagerank", iterate_pagerank, corpus,
+                  DAMPING, memory=memory)
+        run_stage(stages, "sample_pagerank", sample_pagerank, corpus,
+                  DAMPING, args.reference_samples, memory=memory)
+
+    # High-water marks so far, in kilobytes on Linux
+    return {
+        "generator": kind,
+        "pages": num_pages,
+        "links": len(graph.sources),
+        "dangling": len(graph.dangling),
+        "stages": stages,
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "max_rss_children":
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time every pagerank stage on generated corpora and "
+        "write the results as JSON."
+    )
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS),
+                        default=["random", "scale-free", "dangling"])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 10 ** 4, 10 ** 5])
+    parser.add_argument("--links", type=int, default=10,
+                        help="average links per page")
+    parser.add_argument("--format", choices=["html", "edges"], default="html",
+                        help="write corpora as HTML pages to crawl, or "
+                        "straight to edge files")
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS),
+                        default=list(SOLVERS))
+    parser.add_argument("--tolerance", type=float, default=1e-8)
+    parser.add_argument("--samples", type=int, default=10 ** 6)
+    parser.add_argument("--reference-limit", type=int, default=1000,
+                        help="largest corpus to run iterate_pagerank and "
+                        "sample_pagerank on")
+    parser.add_argument("--reference-samples", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="crawler processes (default: one per core)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc runs that record peak "
+                        "memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": vars(args),
+        "results": []
+    }
+    for kind in args.generators:
+        for num_pages in args.sizes:
+            print(f"{kind}, {num_pages} pages:", file=sys.stderr)
+            with tempfile.TemporaryDirectory() as directory:
+                report["results"].append(
+                    run_case(args, kind, num_pages, directory)
+                )
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
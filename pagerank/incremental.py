@@ -0,0 +1,237 @@
+import argparse
+import os
+import time
+import numpy as np
+
+from crawler import crawl_to_file
+from edgefile import EDGE_FILE
+from engine import LinkGraph, power_iteration
+from pagerank import DAMPING
+
+# Rank vector of the last run, stored next to its edge file
+RANK_FILE = "ranks.npy"
+
+
+def page_mapping(old, new):
+    """
+    Return an array mapping the ids of the pages of graph `old` to their
+    ids in graph `new`, or to -1 for pages not in `new`.
+    """
+    if old.pages == new.pages:
+        return np.arange(old.num_pages())
+    return np.array(
+        [new.index.get(page, -1) for page in old.pages], dtype=np.int64
+    )
+
+
+def diff_graphs(old, new):
+    """
+    Return a dictionary describing how graph `new` differs from graph
+    `old`: pages added and removed, links added and removed, the ids in
+    `new` of the pages whose links changed, the ids in `new` of the
+    pages whose incoming links or their weights changed, and the
+    mapping from `page_mapping`.
+    """
+    n = new.num_pages()
+    old_to_new = page_mapping(old, new)
+    sources = old_to_new[old.sources]
+    targets = old_to_new[old.targets]
+    kept = (sources >= 0) & (targets >= 0)
+    old_keys = sources[kept] * n + targets[kept]
+    # Edges loaded from a file are int32, too small for the keys
+    new_keys = new.sources.astype(np.int64) * n + new.targets
+
+    removed = np.setdiff1d(old_keys, new_keys)
+    added = np.setdiff1d(new_keys, old_keys)
+    new_pages = np.setdiff1d(np.arange(n), old_to_new)
+    # Pages that still exist but lost links to removed pages
+    dropped = sources[~kept]
+    dropped = dropped[dropped >= 0]
+    changed = np.union1d(
+        np.union1d(removed // n, added // n), np.union1d(dropped, new_pages)
+    )
+
+    # Every link of a changed page has a new weight, and pages linked
+    # from removed pages or by removed links lose incoming rank
+    offsets, outlinks = new.outlinks()
+    counts = new.out_degree[changed]
+    ends = np.cumsum(counts)
+    links = np.arange(ends[-1] if len(ends) else 0) + np.repeat(
+        offsets[changed] - (ends - counts), counts
+    )
+    orphaned = targets[~kept]
+    touched = np.unique(np.concatenate((
+        outlinks[links], removed % n, orphaned[orphaned >= 0], new_pages
+    )))
+    return {
+        "pages_added": len(new_pages),
+        "pages_removed": int((old_to_new < 0).sum()),
+        "links_added": len(added),
+        "links_removed": len(removed) + int((~kept).sum()),
+        "changed": changed,
+        "touched": touched,
+        "old_to_new": old_to_new
+    }
+
+
+def warm_start(old, old_rank, new, old_to_new=None):
+    """
+    Return a starting vector for `new` from the ranks `old_rank` of the
+    pages of graph `old`, mapped by `old_to_new` from `page_mapping` if
+    given. New pages start at 1/N, and the vector is rescaled to sum to
+    one.
+    """
+    if old_to_new is None:
+        old_to_new = page_mapping(old, new)
+    rank = np.full(new.num_pages(), 1 / new.num_pages())
+    kept = old_to_new >= 0
+    rank[old_to_new[kept]] = old_rank[kept]
+    return rank / rank.sum()
+
+
+def step_rows(graph, damping_factor, rank, rows):
+    """
+    Return one power-iteration step of `rank` at the pages `rows` only,
+    from their incoming links, which are contiguous as edges are sorted
+    by target.
+    """
+    n = graph.num_pages()
+    starts = np.searchsorted(graph.targets, rows)
+    counts = np.searchsorted(graph.targets, rows, side="right") - starts
+    ends = np.cumsum(counts)
+    edges = np.arange(ends[-1] if len(ends) else 0) + np.repeat(
+        starts - (ends - counts), counts
+    )
+    incoming = np.bincount(
+        np.repeat(np.arange(len(rows)), counts),
+        weights=rank[graph.sources[edges]] * graph.weights[edges],
+        minlength=len(rows)
+    )
+    dangling_mass = rank[graph.dangling].sum()
+    return (1 - damping_factor) / n + damping_factor * (
+        incoming + dangling_mass / n
+    )
+
+
+def warm_pagerank(old, old_rank, new, damping_factor, tolerance=0.001,
+                  changes=None, stats=None):
+    """
+    Return the PageRank vector of `new` by power iteration from the
+    ranks `old_rank` of graph `old`, which were converged on `old`.
+
+    When both graphs have the same pages and the same pages without
+    links, a step from the old ranks only moves the pages whose incoming
+    links changed, the `touched` pages of `changes` from `diff_graphs`.
+    The convergence check is first made on those pages alone, from
+    their incoming links, and if none of them moves by more than
+    `tolerance` the old ranks are returned without a full iteration.
+    If `stats` is given, records the number of iterations.
+    """
+    if changes is None:
+        changes = diff_graphs(old, new)
+    old_to_new = changes["old_to_new"]
+    rank = warm_start(old, old_rank, new, old_to_new)
+    if (not changes["pages_added"] and not changes["pages_removed"]
+            and np.array_equal(
+                np.sort(old_to_new[old.dangling]), new.dangling
+            )):
+        rows = changes["touched"]
+        residual = step_rows(new, damping_factor, rank, rows) - rank[rows]
+        if not len(rows) or np.abs(residual).max() <= tolerance:
+            if stats is not None:
+                stats["iterations"] = 0
+            return rank
+    return power_iteration(
+        new, damping_factor, tolerance, rank=rank, stats=stats
+    )
+
+
+def load_state(directory):
+    """
+    Return the graph and rank vector saved by the last run over
+    `directory`, or None if there is none.
+    """
+    edges = os.path.join(directory, EDGE_FILE)
+    ranks = os.path.join(directory, RANK_FILE)
+    if not (os.path.exists(edges) and os.path.exists(ranks)):
+        return None
+    try:
+        graph = LinkGraph.from_edge_file(edges)
+    except ValueError:
+        # Written in an older format, so start over
+        return None
+    rank = np.load(ranks)
+    if len(rank) != graph.num_pages():
+        return None
+    return graph, rank
+
+
+def update(directory, damping_factor, tolerance, processes=None):
+    """
+    Re-crawl `directory` and return its graph, PageRank vector and a
+    dictionary of statistics, starting from the ranks saved by the last
+    run if there are any, then save the new edge list and ranks.
+    """
+    state = load_state(directory)
+    stats = {"warm": state is not None}
+
+    start = time.perf_counter()
+    path = os.path.join(directory, EDGE_FILE + ".new")
+    crawl_to_file(directory, path, processes)
+    graph = LinkGraph.from_edge_file(path)
+    stats["crawl"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if state is None:
+        rank = power_iteration(
+            graph, damping_factor, tolerance, stats=stats
+        )
+    else:
+        old, old_rank = state
+        changes = diff_graphs(old, graph)
+        stats.update(changes)
+        rank = warm_pagerank(
+            old, old_rank, graph, damping_factor, tolerance, changes, stats
+        )
+    stats["solve"] = time.perf_counter() - start
+
+    os.replace(path, os.path.join(directory, EDGE_FILE))
+    np.save(os.path.join(directory, RANK_FILE), rank)
+    return graph, rank, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute PageRank for a corpus, starting from the "
+        "ranks saved by the last run over it."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--tolerance", type=float, default=0.001)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="crawler processes (default: one per core)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of highest ranked pages to print")
+    args = parser.parse_args()
+
+    graph, rank, stats = update(
+        args.directory, DAMPING, args.tolerance, args.processes
+    )
+
+    print(f"Crawled {graph.num_pages()} pages in {stats['crawl']:.2f}s.")
+    if stats["warm"]:
+        print(f"{stats['pages_added']} pages added, "
+              f"{stats['pages_removed']} removed, "
+              f"{stats['links_added']} links added, "
+              f"{stats['links_removed']} removed, "
+              f"{len(stats['changed'])} pages changed.")
+    start = "warm" if stats["warm"] else "cold"
+    print(f"Solved from a {start} start in {stats['iterations']} "
+          f"iterations, {stats['solve']:.2f}s.")
+
+    print("Highest PageRank")
+    for i in np.argsort(-rank, kind="stable")[:args.top].tolist():
+        print(f"  {graph.pages[i]}: {rank[i]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import copy
 import re
 import sys
 
+from engine import matrix_pagerank, sampled_pagerank
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -12,11 +14,11 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
     corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    ranks = sampled_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks = matrix_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
@@ -132,35 +134,24 @@ def iterate_pagerank(corpus, damping_factor):
 
     while max_difference > 0.001:
         for page_p in corpus:
-            print(f"ENTERED page_p: {page_p}")
-            # print(f"LINKS in {page_p} are: {corpus[page_p]}")
             gamma = 0
-            # print(f"GAMMMA: gamma is 0")
-                        
+
             # traverse all pages that link to page_p
             for page_i in corpus.keys():
-                print(f"    entered page_i: {page_i}")
                 # only if they link to page_p
-
                 if not corpus[page_i]:
                     gamma += pageRank[page_i]/len(corpus)
-                    print(f"        gamma without links: {gamma}")
                 else:
                     if page_p in corpus[page_i]:
-                        # print(f"page_i: {page_i} links to page_p: {page_p}, as links in page_i are: {corpus[page_i]}")
                         gamma += pageRank[page_i]/len(corpus[page_i])
-                        print(f"        gamma with links: {gamma}")                        
-                        
+
             # update new_pageRank
             new_pageRank[page_p] = (1-damping_factor)/len(corpus) + damping_factor*gamma
-            print(f"new pagerank of: {page_p} is: {new_pageRank[page_p]}")
-        
+
         # update diff
-        # print(f"pageRank: {pageRank}, \n new_pageRank: {new_pageRank}")
         differences = {key: abs(pageRank[key] - new_pageRank[key]) for key in pageRank.keys() & new_pageRank.keys()}
         max_difference = max(differences.values())
         pageRank = new_pageRank.copy()
-        # print(f"max_difference: {max_difference}")
 
     return new_pageRank
 
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class PersonalizedPageRank():
+    """
+    Personalized PageRank over one preprocessed LinkGraph.
+
+    With probability `damping_factor` the surfer follows a random link,
+    otherwise it jumps back to a page drawn from the seed distribution
+    instead of a uniformly random page. Pages without links also jump
+    back to the seeds. Seeds are given as a list of page names, weighted
+    equally, or as a dictionary mapping page names to weights.
+    """
+
+    def __init__(self, graph, damping_factor):
+        self.graph = graph
+        self.damping_factor = damping_factor
+
+        graph.outlinks()
+        # Pages without links are pushed like pages with one link
+        self.degrees = np.maximum(graph.out_degree, 1)
+
+    def seed_weights(self, seeds):
+        """
+        Return a dictionary mapping page indices to the weights of
+        `seeds`, scaled to sum to one.
+        """
+        if not isinstance(seeds, dict):
+            seeds = {page: 1 for page in seeds}
+        total = sum(seeds.values())
+        if not seeds or total <= 0:
+            raise ValueError("seeds must have a positive total weight")
+        return {
+            self.graph.index[page]: weight / total
+            for page, weight in seeds.items()
+        }
+
+    def push(self, seeds, epsilon=1e-6, stats=None):
+        """
+        Return the personalized PageRank vector for `seeds` by forward
+        push.
+
+        Every page starts with a residual, its seed weight. In each round,
+        every page whose residual exceeds `epsilon` times its number of
+        links is pushed at once: `1 - damping_factor` of the residual is
+        kept as rank and the rest is split among its links. Only the links
+        of pushed pages are gathered, and while they are few only the pages
+        they reach are checked, so a query touches the part of the graph
+        near its seeds. Every page's rank is underestimated by at
+        most the residual left over, whose total is recorded in `stats`
+        along with the number of rounds and pushes.
+        """
+        weights = self.seed_weights(seeds)
+        seed_pages = np.fromiter(weights, dtype=np.int64)
+        seed_weights = np.fromiter(weights.values(), dtype=float)
+        graph = self.graph
+        n = graph.num_pages()
+        offsets, targets = graph.outlinks()
+
+        rank = np.zeros(n)
+        residual = np.zeros(n)
+        residual[seed_pages] = seed_weights
+        rounds = pushes = 0
+
+        active = np.flatnonzero(residual > epsilon * self.degrees)
+        while len(active):
+            values = residual[active]
+            residual[active] = 0
+            rank[active] += (1 - self.damping_factor) * values
+            rounds += 1
+            pushes += len(active)
+
+            # Gather the links of every pushed page with links
+            degrees = graph.out_degree[active]
+            linked = degrees > 0
+            counts = degrees[linked]
+            ends = np.cumsum(counts)
+            edges = np.arange(ends[-1] if len(ends) else 0) + np.repeat(
+                offsets[active[linked]] - (ends - counts), counts
+            )
+            shares = np.repeat(
+                self.damping_factor * values[linked] / counts, counts
+            )
+            touched = targets[edges]
+            sparse = len(touched) < n // 8
+            if sparse:
+                np.add.at(residual, touched, shares)
+            else:
+                residual += np.bincount(touched, shares, minlength=n)
+
+            # Pages without links send the surfer back to the seeds
+            residual[seed_pages] += (
+                self.damping_factor * values[~linked].sum() * seed_weights
+            )
+
+            if sparse:
+                # Only pages that just received residual can cross the
+                # threshold, which is cheaper to check than every page
+                touched = np.unique(np.concatenate((touched, seed_pages)))
+                active = touched[
+                    residual[touched] > epsilon * self.degrees[touched]
+                ]
+            else:
+                active = np.flatnonzero(residual > epsilon * self.degrees)
+
+        if stats is not None:
+            stats["rounds"] = rounds
+            stats["pushes"] = pushes
+            stats["residual"] = residual.sum()
+        return rank
+
+    def ranks(self, scores, limit=None):
+        """
+        Return a dictionary mapping page names to `scores`, a vector from
+        `push`, highest first, keeping only the `limit` highest scoring
+        pages if `limit` is given.
+        """
+        best = np.argsort(-scores, kind="stable")[:limit]
+        return {self.graph.pages[page]: scores[page] for page in best.tolist()}
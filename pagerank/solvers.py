@@ -0,0 +1,195 @@
+import time
+
+import numpy as np
+
+
+def record(stats, start, residual):
+    """
+    Record the L1 residual of an iteration and the time since `start`.
+    """
+    if stats is not None:
+        stats["residuals"].append(residual)
+        stats["times"].append(time.perf_counter() - start)
+
+
+def jacobi(graph, damping_factor, rank, tolerance, max_iterations, stats):
+    """
+    Plain power iteration: every page is updated from the values of the
+    previous iteration.
+    """
+    start = time.perf_counter()
+    for _ in range(max_iterations):
+        new_rank = graph.step(rank, damping_factor)
+        residual = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        record(stats, start, residual)
+        if residual <= tolerance:
+            break
+    return rank
+
+
+def gauss_seidel(graph, damping_factor, rank, tolerance, max_iterations,
+                 stats, blocks=64):
+    """
+    Block Gauss-Seidel: pages are updated in `blocks` contiguous blocks,
+    each from the values already updated earlier in the same sweep.
+
+    Edges are sorted by target, so the incoming links of a block are a
+    contiguous slice of the edge arrays and each block is one vectorised
+    update, as in `LinkGraph.multiply`.
+
+    The sweep solves the eigenproblem of the Google matrix rather than
+    the linear system with a constant teleport term: the teleport and
+    dangling terms come from the current total and dangling mass, both
+    kept up to date within the sweep. Every sweep is then linear in
+    `rank`, so normalising it afterwards does not change the iterates'
+    direction, only keeps the total at one.
+
+    In-place updates do not keep the mass of groups of pages that link
+    only among themselves, which Jacobi iteration keeps exactly, so the
+    change per sweep can settle at a ratio close to `damping_factor` and
+    the error stay well above it. The iteration only stops once the
+    error that ratio predicts, `residual * ratio / (1 - ratio)`, is also
+    within `tolerance`.
+    """
+    n = graph.num_pages()
+    bounds = np.linspace(0, n, min(blocks, n) + 1).astype(np.int64)
+    edge_bounds = np.searchsorted(graph.targets, bounds)
+    is_dangling = graph.out_degree == 0
+    rank = rank / rank.sum()
+    last_residual = np.inf
+
+    start = time.perf_counter()
+    for _ in range(max_iterations):
+        previous = rank.copy()
+        dangling_mass = rank[is_dangling].sum()
+        total = 1.0
+        for i in range(len(bounds) - 1):
+            low, high = bounds[i], bounds[i + 1]
+            first, last = edge_bounds[i], edge_bounds[i + 1]
+            sources = graph.sources[first:last]
+            incoming = np.bincount(
+                graph.targets[first:last] - low,
+                weights=rank[sources] * graph.weights[first:last],
+                minlength=high - low
+            )
+            new_values = (1 - damping_factor) * total / n + damping_factor * (
+                incoming + dangling_mass / n
+            )
+            change = new_values - rank[low:high]
+            dangling_mass += change[is_dangling[low:high]].sum()
+            total += change.sum()
+            rank[low:high] = new_values
+
+        rank /= rank.sum()
+        residual = np.abs(rank - previous).sum()
+        record(stats, start, residual)
+        ratio = min(residual / last_residual, 0.99)
+        if residual <= tolerance and residual * ratio <= tolerance * (1 - ratio):
+            break
+        last_residual = residual
+    return rank
+
+
+def extrapolated(graph, damping_factor, rank, tolerance, max_iterations,
+                 stats, wait=3):
+    """
+    Power iteration with quadratic extrapolation.
+
+    The error of an iterate is mostly along the eigenvectors with the next
+    largest eigenvalues, which may be negative or complex, as on corpora
+    of pages that link back and forth. Every `wait` iterations the last
+    four iterates are combined to cancel two such components at once, as
+    in `quadratic_extrapolation`.
+
+    A jump is kept only if the residual of the next iteration is smaller
+    than the one before the jump. Otherwise it came before the error
+    settled into those components, as in the first iterations on large
+    graphs, so it is undone and the wait before the next one doubled.
+    """
+    iterates = [rank]
+    jumped = None
+    start = time.perf_counter()
+    for _ in range(max_iterations):
+        new_rank = graph.step(rank, damping_factor)
+        residual = np.abs(new_rank - rank).sum()
+        record(stats, start, residual)
+
+        if jumped is not None:
+            before, before_residual = jumped
+            jumped = None
+            if residual >= before_residual:
+                # Go on from the iterate the jump started from
+                rank = before
+                iterates = [rank]
+                wait *= 2
+                continue
+        if residual <= tolerance:
+            return new_rank
+
+        iterates.append(new_rank)
+        if len(iterates) > wait and len(iterates) >= 4:
+            estimate = quadratic_extrapolation(*iterates[-4:])
+            if estimate is not None:
+                jumped = (new_rank, residual)
+                new_rank = estimate
+                iterates = [new_rank]
+        rank = new_rank
+    return rank
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Return the estimate of the PageRank vector from four successive power
+    iterates that cancels the error components along two eigenvectors,
+    as in Kamvar et al., "Extrapolation Methods for Accelerating PageRank
+    Computations", or None if the iterates do not determine one.
+
+    If `x0` is the sum of the PageRank vector and two eigenvectors, the
+    iterates satisfy a three-term recurrence whose coefficients are found
+    by least squares; the same coefficients then combine `x1` to `x3`
+    into the fixed point.
+    """
+    differences = np.stack((x1 - x0, x2 - x0), axis=1)
+    gamma = np.linalg.lstsq(differences, x0 - x3, rcond=None)[0]
+    estimate = (
+        (gamma[0] + gamma[1] + 1) * x1 + (gamma[1] + 1) * x2 + x3
+    )
+    total = estimate.sum()
+    if not np.isfinite(total) or total == 0:
+        return None
+    return estimate / total
+
+
+# Solvers by name, for solve and the benchmark
+SOLVERS = {
+    "jacobi": jacobi,
+    "gauss-seidel": gauss_seidel,
+    "extrapolated": extrapolated
+}
+
+
+def solve(graph, damping_factor, solver="jacobi", tolerance=1e-8,
+          max_iterations=1000, rank=None, stats=None):
+    """
+    Return the PageRank vector of `graph` using the solver named `solver`,
+    from `rank` or from the uniform vector.
+
+    Every solver stops once the L1 norm of the change made by an
+    iteration, which for Jacobi iteration is the L1 residual, is at most
+    `tolerance`, or after `max_iterations` iterations. If `stats` is
+    given, records the number of iterations and, for each iteration, its
+    residual in `stats["residuals"]` and the seconds elapsed since the
+    start in `stats["times"]`.
+    """
+    if rank is None:
+        rank = np.full(graph.num_pages(), 1 / graph.num_pages())
+    if stats is not None:
+        stats["residuals"] = []
+        stats["times"] = []
+    rank = SOLVERS[solver](
+        graph, damping_factor, rank, tolerance, max_iterations, stats
+    )
+    if stats is not None:
+        stats["iterations"] = len(stats["residuals"])
+    return rank
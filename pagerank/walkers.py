@@ -0,0 +1,72 @@
+import multiprocessing
+
+import numpy as np
+
+from engine import LinkGraph, sample_visits
+
+# Graph sampled by the walkers of a worker process, set by init_worker
+worker_graph = None
+
+
+def init_worker(graph):
+    """
+    Make `graph` available to the walkers of a worker process.
+    """
+    global worker_graph
+    worker_graph = graph
+
+
+def walk(task):
+    """
+    Return the visit counts of one walker, given as a
+    `(damping_factor, samples, seed)` task.
+    """
+    damping_factor, samples, seed = task
+    return sample_visits(worker_graph, damping_factor, samples, seed)
+
+
+def walker_tasks(damping_factor, n, walkers, seed):
+    """
+    Split `n` samples between `walkers` independent walkers, each with
+    its own seed spawned from `seed`, so that results depend only on
+    `seed` and `walkers`, not on the number of processes.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(walkers)
+    for i, walker_seed in enumerate(seeds):
+        samples = n // walkers + (1 if i < n % walkers else 0)
+        if samples:
+            yield damping_factor, samples, walker_seed
+
+
+def parallel_visits(graph, damping_factor, n, walkers, processes, seed=None):
+    """
+    Return the visit counts of `n` samples on `graph` taken by `walkers`
+    independent random surfers, run in a pool of `processes` workers and
+    merged.
+    """
+    visits = np.zeros(graph.num_pages(), dtype=np.int64)
+    tasks = walker_tasks(damping_factor, n, walkers, seed)
+    if processes == 1:
+        init_worker(graph)
+        for task in tasks:
+            visits += walk(task)
+        return visits
+
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(graph,)
+    ) as pool:
+        for partial in pool.imap_unordered(walk, tasks):
+            visits += partial
+    return visits
+
+
+def walker_pagerank(corpus, damping_factor, n, walkers, processes, seed=None):
+    """
+    Return PageRank values for each page of `corpus`, as
+    `sample_pagerank` does, from `n` samples taken by parallel walkers.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    visits = parallel_visits(
+        graph, damping_factor, n, walkers, processes, seed
+    )
+    return graph.ranks(visits / n)